@@ -1,28 +1,62 @@
-import subprocess
+import argparse
+import difflib
+import importlib.util
+import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import difflib
+
+TESTS_DIR = Path(__file__).resolve().parent
+ROOT = TESTS_DIR.parent.parent
+HELPER_PATH = ROOT / "scripts" / "auto-pr-helper.py"
+
+
+def load_helper():
+    # The script's file name is not a valid module name, so import it from its path
+    spec = importlib.util.spec_from_file_location("auto_pr_helper", HELPER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+helper = load_helper()
 
 
 def normalize_ids(text: str) -> str:
     return re.sub(r"(:id:\s+[a-z_]+)_[a-zA-Z0-9]+", r"\1_IGNORED_ID", text)
 
 
-def compare(issue_json_path: Path, snapshot_path: Path) -> bool:
-    input_json = issue_json_path.read_text()
+def discover_tests(tests_dir: Path) -> dict:
+    """Find every test_issue_XX.json with a matching test_issue_XX.snapshot"""
+    tests = {}
+    for issue_json in sorted(tests_dir.glob("test_issue_*.json")):
+        snapshot = issue_json.with_suffix(".snapshot")
+        if snapshot.exists():
+            tests[issue_json.stem] = (issue_json, snapshot)
+        else:
+            print(f"warning: {issue_json.name} has no snapshot, skipping it")
+    return tests
 
-    result = subprocess.run(
-        ["uv", "run", "python", "scripts/auto-pr-helper.py"],
-        input=input_json.encode(),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.DEVNULL,
-        check=True,
-    )
+
+def compare(issue_json_path: Path, snapshot_path: Path) -> tuple:
+    """
+    Render an issue in-process and compare it with its snapshot.
+
+    Returns:
+        Tuple of (passed, seconds taken, diff lines)
+    """
+    start = time.perf_counter()
+    json_issue = json.loads(issue_json_path.read_text())
+    result = helper.render_issue(json_issue)
 
     # Normalize the actual output and the snapshot, this is crucial in snapshot tests to
     # ignore random/volatile values.
-    actual_output = normalize_ids(result.stdout.decode())
+    actual_output = normalize_ids(helper.content_output(result["content"]))
     expected_output = normalize_ids(snapshot_path.read_text())
+    seconds = time.perf_counter() - start
 
     # Compare
     if actual_output != expected_output:
@@ -33,37 +67,58 @@ def compare(issue_json_path: Path, snapshot_path: Path) -> bool:
             tofile="generated",
             lineterm="",
         )
-        print(f"Difference found in {issue_json_path.name}:")
-        print("\n".join(diff))
-        return False
-    else:
-        print(f"{issue_json_path.name} matches snapshot.")
-        return True
+        return False, seconds, list(diff)
+    return True, seconds, []
+
+
+def run_case(case):
+    name, (issue_json, snapshot) = case
+    try:
+        return (name, *compare(issue_json, snapshot))
+    except Exception as e:
+        return name, False, 0.0, [f"error: {e!r}"]
 
 
 # to generate snapshot:
 # create or change the test_issue_xx file and then use this command after replacing XX with your test number:
 ## `cat .github/auto-pr-tests/test_issue_XX.json | uv run python scripts/auto-pr-helper.py 2&>/dev/null > .github/auto-pr-tests/test_issue_0XX.snapshot`
-tests = {
-    "test_01": (
-        Path(".github/auto-pr-tests/test_issue_01.json"),
-        Path(".github/auto-pr-tests/test_issue_01.snapshot"),
-    ),
-    "test_02": (
-        Path(".github/auto-pr-tests/test_issue_02.json"),
-        Path(".github/auto-pr-tests/test_issue_02.snapshot"),
-    ),
-    "test_03": (
-        Path(".github/auto-pr-tests/test_issue_03.json"),
-        Path(".github/auto-pr-tests/test_issue_03.snapshot"),
-    ),
-}
-
-# Run all tests
-all_passed = True
-for name, (issue_json, snapshot) in tests.items():
-    if not compare(issue_json, snapshot):
-        all_passed = False
-
-if not all_passed:
-    exit(1)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the auto-pr snapshot tests.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    parser.add_argument("-k", dest="pattern", help="Only run the tests whose name contains this.")
+    args = parser.parse_args()
+
+    tests = discover_tests(TESTS_DIR)
+    if args.pattern:
+        tests = {name: paths for name, paths in tests.items() if args.pattern in name}
+    if not tests:
+        print("No tests found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.jobs > 1 and len(tests) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(tests))) as pool:
+            results = list(pool.map(run_case, tests.items()))
+    else:
+        results = [run_case(case) for case in tests.items()]
+    elapsed = time.perf_counter() - start
+
+    # Run all tests
+    all_passed = True
+    for name, passed, seconds, diff in results:
+        if passed:
+            print(f"{name}.json matches snapshot. ({seconds * 1000:.1f} ms)")
+        else:
+            all_passed = False
+            print(f"Difference found in {name}.json: ({seconds * 1000:.1f} ms)")
+            print("\n".join(diff))
+
+    print(f"\n{sum(passed for _, passed, _, _ in results)}/{len(results)} passed in {elapsed:.2f} s")
+    if not all_passed:
+        sys.exit(1)
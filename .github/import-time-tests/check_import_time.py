@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Modules whose import time is budgeted, as (name, modules imported first, budget in
+# milliseconds, modules that must not be imported). The extension is loaded by Sphinx
+# after sphinx_needs, so only what it adds on top of those is counted.
+CASES = [
+    ("coding_guidelines", ("sphinx.application", "sphinx_needs"), 80, ("requests", "tqdm", "cProfile")),
+    ("builder.build_cli", (), 40, ("requests", "sphinx")),
+    # Computes coverage without running Sphinx, so it must not import it either
+    ("coverage_delta", (), 100, ("requests", "sphinx")),
+]
+
+# Number of modules listed when a case goes over its budget
+TOP_MODULES = 10
+
+
+def measure(module, preload, forbidden):
+    """
+    Import a module in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        Tuple of (cumulative import time of the module in microseconds,
+        list of (self time, name) of the modules it imported, forbidden modules that were imported)
+    """
+    code = "; ".join(
+        [f"import {name}" for name in preload]
+        + [
+            f"import {module}",
+            "import json, sys",
+            f"print(json.dumps([name for name in {list(forbidden)!r} if name in sys.modules]))",
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT / "exts")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are written when an import finishes, so the modules imported by the module
+    # are the lines between the previous top-level import and its own
+    imported = []
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header or unrelated output
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+        # Nested imports are indented by two spaces per level
+        is_top_level = not fields[2].startswith("  ")
+        if is_top_level and name == module:
+            return cumulative_us, imported, json.loads(result.stdout)
+        if is_top_level:
+            imported = []
+        else:
+            imported.append((self_us, name))
+    raise RuntimeError(f"{module} not found in the -X importtime output")
+
+
+def run_case(module, preload, budget_ms, forbidden, runs):
+    """Measure a case ``runs`` times and return the list of failures"""
+    best = None
+    for _ in range(runs):
+        cumulative_us, imported, loaded = measure(module, preload, forbidden)
+        if best is None or cumulative_us < best[0]:
+            best = (cumulative_us, imported, loaded)
+    cumulative_us, imported, loaded = best
+
+    print(f"{module}: {cumulative_us / 1000:.1f} ms (budget {budget_ms} ms)")
+    failures = []
+    if cumulative_us > budget_ms * 1000:
+        failures.append(f"{module} takes {cumulative_us / 1000:.1f} ms to import, over its budget of {budget_ms} ms")
+        for self_us, name in sorted(imported, reverse=True)[:TOP_MODULES]:
+            print(f"  {self_us / 1000:8.1f} ms  {name}")
+    for name in loaded:
+        failures.append(f"importing {module} imports {name}, which should only be imported when it is used")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the extension and the builder")
+    parser.add_argument("--runs", type=int, default=5, help="imports per module, the fastest is kept (default: 5)")
+    args = parser.parse_args()
+
+    failures = []
+    for module, preload, budget_ms, forbidden in CASES:
+        failures.extend(run_case(module, preload, budget_ms, forbidden, args.runs))
+
+    if failures:
+        print("\nImport time check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nAll imports within budget")
+
+
+if __name__ == "__main__":
+    main()
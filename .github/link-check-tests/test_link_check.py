@@ -0,0 +1,181 @@
+import argparse
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+
+from builder import link_check  # noqa: E402
+
+# Seconds the stand-in server takes to answer /slow
+SLOW_SECONDS = 0.2
+
+
+class StandIn(ThreadingHTTPServer):
+    """Local server answering the link checker, counting the requests it gets"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.requests = []
+        self.open = 0
+        self.max_open = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def url(self, path, host="127.0.0.1"):
+        return f"http://{host}:{self.server_address[1]}{path}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def answer(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+            server.open += 1
+            server.max_open = max(server.max_open, server.open)
+        try:
+            path = self.path.split("?")[0]
+            if path == "/slow":
+                time.sleep(SLOW_SECONDS)
+            if path in ("/ok", "/slow") or (path == "/no-head" and self.command == "GET"):
+                self.send_response(200)
+            elif path == "/no-head":
+                self.send_response(405)
+            elif path == "/redirect":
+                self.send_response(301)
+                self.send_header("Location", "/ok")
+            else:
+                self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.open -= 1
+
+    do_HEAD = answer
+    do_GET = answer
+
+
+def write_site(html_dir, pages):
+    """Write pages of links, given as file name -> list of hrefs"""
+    for name, hrefs in pages.items():
+        path = html_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("<html><body>" + "".join(f'<a href="{href}">link</a>' for href in hrefs) + "</body></html>")
+
+
+def run(html_dir, cache_path, **kwargs):
+    return link_check.check_links(html_dir, cache_path, **kwargs)
+
+
+def test_collects_external_links_once(server, tmp):
+    write_site(tmp / "html", {
+        "index.html": [server.url("/ok"), server.url("/ok#section"), "chapter.html", "#top", "mailto:x@example.com"],
+        "sub/chapter.html": [server.url("/ok")],
+    })
+    links, results, checked = run(tmp / "html", tmp / "cache.json")
+    assert links == {server.url("/ok"): ["index.html", "sub/chapter.html"]}, links
+    assert checked == 1 and len(server.requests) == 1, server.requests
+    assert results[server.url("/ok")]["error"] is None
+
+
+def test_reports_broken_links(server, tmp):
+    urls = [server.url(path) for path in ("/ok", "/missing", "/no-head", "/redirect")]
+    write_site(tmp / "html", {"index.html": urls + ["http://127.0.0.1:1/unreachable"]})
+    links, results, _ = run(tmp / "html", tmp / "cache.json", timeout=5)
+    broken = {url for url, entry in results.items() if entry["error"] is not None}
+    assert broken == {server.url("/missing"), "http://127.0.0.1:1/unreachable"}, broken
+    assert results[server.url("/missing")]["status"] == 404
+    assert ("GET", "/no-head") in server.requests
+    assert not link_check.report(links, results, len(links))
+
+
+def test_cache_skips_working_links_until_they_expire(server, tmp):
+    write_site(tmp / "html", {"index.html": [server.url("/ok"), server.url("/missing")]})
+    run(tmp / "html", tmp / "cache.json")
+    first = len(server.requests)
+
+    # Only the broken link is checked again while the working one is fresh
+    _, _, checked = run(tmp / "html", tmp / "cache.json")
+    assert checked == 1 and server.requests[first:] == [("HEAD", "/missing"), ("GET", "/missing")], server.requests
+
+    # With a TTL of zero every entry has expired
+    _, _, checked = run(tmp / "html", tmp / "cache.json", ttl=0)
+    assert checked == 2, checked
+
+
+def test_cache_drops_links_no_longer_on_the_pages(server, tmp):
+    write_site(tmp / "html", {"index.html": [server.url("/ok"), server.url("/missing")]})
+    run(tmp / "html", tmp / "cache.json")
+
+    write_site(tmp / "html", {"index.html": [server.url("/ok")]})
+    run(tmp / "html", tmp / "cache.json")
+    cached = link_check.load_cache(tmp / "cache.json")
+    assert list(cached) == [server.url("/ok")], cached
+
+
+def test_limits_requests_per_host(server, tmp):
+    urls = [server.url(f"/slow?{n}") for n in range(8)]
+    write_site(tmp / "html", {"index.html": urls})
+    start = time.perf_counter()
+    run(tmp / "html", tmp / "cache.json", per_host=2)
+    elapsed = time.perf_counter() - start
+    assert server.max_open == 2, server.max_open
+    assert elapsed >= 4 * SLOW_SECONDS, elapsed
+
+
+def test_checks_hosts_concurrently(server, tmp):
+    # 127.0.0.1 and localhost are different hosts to the checker, each with its own limit
+    urls = [server.url(f"/slow?{n}", host) for n in range(4) for host in ("127.0.0.1", "localhost")]
+    write_site(tmp / "html", {"index.html": urls})
+    start = time.perf_counter()
+    run(tmp / "html", tmp / "cache.json", per_host=4)
+    elapsed = time.perf_counter() - start
+    assert server.max_open == 8, server.max_open
+    assert elapsed < 3 * SLOW_SECONDS, elapsed
+
+
+TESTS = {name: test for name, test in globals().items() if name.startswith("test_")}
+
+
+def run_test(test):
+    server = StandIn()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(server, Path(tmp))
+        return True, ""
+    except Exception:
+        return False, traceback.format_exc()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the link checker against a local stand-in server.")
+    parser.add_argument("-k", dest="pattern", help="Only run the tests whose name contains this.")
+    args = parser.parse_args()
+
+    tests = {name: test for name, test in TESTS.items() if not args.pattern or args.pattern in name}
+    start = time.perf_counter()
+    passed = 0
+    for name, test in tests.items():
+        ok, error = run_test(test)
+        passed += ok
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+        if error:
+            print(error)
+
+    print(f"\n{passed}/{len(tests)} passed in {time.perf_counter() - start:.2f} s")
+    if passed != len(tests):
+        sys.exit(1)
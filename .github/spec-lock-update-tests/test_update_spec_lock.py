@@ -0,0 +1,212 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+
+from builder import build_cli  # noqa: E402
+
+spec_lock_index = build_cli.import_spec_lock_index()
+
+
+class StandIn(ThreadingHTTPServer):
+    """Local server standing in for the FLS, serving the paragraph IDs set by each test"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        # Path -> (body, Content-Length announced for it)
+        self.files = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def serve(self, path, body, length=None):
+        self.files[path] = (body, len(body) if length is None else length)
+        return self.url(path)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path not in self.server.files:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, length = self.server.files[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        self.wfile.write(body)
+        # A body shorter than announced is cut off by closing the connection
+        self.close_connection = True
+
+
+def paragraph(fls_id, number, checksum):
+    return {"id": fls_id, "number": number, "link": f"expressions.html#{fls_id}", "checksum": checksum * 64}
+
+
+def lock_data(*paragraphs):
+    """Lock data of one document with one section holding the given paragraphs"""
+    return {
+        "documents": [{
+            "title": "Expressions",
+            "link": "expressions.html",
+            "sections": [{
+                "id": "fls_expressions",
+                "number": "6",
+                "title": "Expressions",
+                "link": "expressions.html",
+                "informational": False,
+                "paragraphs": list(paragraphs),
+            }],
+        }],
+    }
+
+
+OLD = lock_data(paragraph("fls_one", "6:1", "a"), paragraph("fls_two", "6:2", "b"))
+NEW = lock_data(paragraph("fls_one", "6:1", "c"), paragraph("fls_three", "6:3", "d"))
+
+
+def write_old_lock(tmp, mode=0o644):
+    lock = tmp / "src" / "spec.lock"
+    lock.parent.mkdir()
+    spec_lock_index.write_lock(lock, OLD)
+    os.chmod(lock, mode)
+    return lock
+
+
+def update(url, lock, tmp):
+    """Run update_spec_lockfile, returning (its result, what it printed)"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        ok = build_cli.update_spec_lockfile(url, lock, tmp / "index")
+    return ok, output.getvalue()
+
+
+def run_make(tmp, url):
+    """Run ./make.py --update-spec-lock-file for a checkout at tmp"""
+    return subprocess.run(
+        [
+            sys.executable, "-c", "import sys; from builder import build_cli; build_cli.main(sys.argv.pop(1))", str(tmp),
+            "--update-spec-lock-file", "--spec-lock-url", url, "--spec-lock-history-dir", str(tmp / "history"),
+        ],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+
+
+def assert_lock_intact(lock, before, result):
+    assert result.returncode == 1, (result.returncode, result.stdout, result.stderr)
+    assert lock.read_bytes() == before
+    assert sorted(path.name for path in lock.parent.iterdir()) == ["spec.lock"], list(lock.parent.iterdir())
+
+
+def test_replaces_the_lock(server, tmp):
+    lock = write_old_lock(tmp, mode=0o664)
+    ok, output = update(server.serve("/paragraph-ids.json", json.dumps(NEW).encode("utf-8")), lock, tmp)
+    assert ok, output
+    assert spec_lock_index.read_lock(lock) == NEW
+    # The temporary download is renamed over the lock and keeps the lock's mode
+    assert lock.stat().st_mode & 0o777 == 0o664, oct(lock.stat().st_mode)
+    # The index is written to the index directory, not next to the lock
+    assert sorted(path.name for path in lock.parent.iterdir()) == ["spec.lock"]
+    index_path = spec_lock_index.index_path_for(lock, tmp / "index")
+    assert sorted((tmp / "index").iterdir()) == [index_path]
+    index = spec_lock_index.SpecLockIndex.open(lock, tmp / "index")
+    assert index.source_size == lock.stat().st_size
+    assert "fls_three" in index and "fls_two" not in index
+
+
+def test_writes_a_new_lock_readable_by_all(server, tmp):
+    lock = tmp / "spec.lock"
+    ok, output = update(server.serve("/paragraph-ids.json", json.dumps(NEW).encode("utf-8")), lock, tmp)
+    assert ok, output
+    assert lock.stat().st_mode & 0o777 == 0o644, oct(lock.stat().st_mode)
+    assert "paragraphs added" not in output, output
+
+
+def test_keeps_the_lock_on_a_truncated_download(server, tmp):
+    lock = write_old_lock(tmp)
+    before = lock.read_bytes()
+    body = json.dumps(NEW).encode("utf-8")
+    result = run_make(tmp, server.serve("/paragraph-ids.json", body[: len(body) // 2], length=len(body)))
+    assert_lock_intact(lock, before, result)
+    assert "Error updating" in result.stdout, result.stdout
+
+
+def test_keeps_the_lock_on_invalid_data(server, tmp):
+    lock = write_old_lock(tmp)
+    before = lock.read_bytes()
+    for url in (
+        server.serve("/not-json", b'{"documents": ['),
+        server.serve("/not-a-lock", json.dumps({"documents": [{"title": "Expressions"}]}).encode("utf-8")),
+        server.url("/missing"),
+    ):
+        assert_lock_intact(lock, before, run_make(tmp, url))
+
+
+def test_prints_the_changes(server, tmp):
+    lock = write_old_lock(tmp)
+    ok, output = update(server.serve("/paragraph-ids.json", json.dumps(NEW).encode("utf-8")), lock, tmp)
+    assert ok, output
+    lines = output.splitlines()
+    summary = lines[lines.index("-- wrote index --") + 1:]
+    assert summary == [
+        "added    fls_three",
+        "removed  fls_two",
+        "changed  fls_one",
+        "1 paragraphs added, 1 removed, 1 changed",
+    ], summary
+
+
+TESTS = {name: test for name, test in globals().items() if name.startswith("test_")}
+
+
+def run_test(test):
+    server = StandIn()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(server, Path(tmp))
+        return True, ""
+    except Exception:
+        return False, traceback.format_exc()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the spec lock updater against a local stand-in server.")
+    parser.add_argument("-k", dest="pattern", help="Only run the tests whose name contains this.")
+    args = parser.parse_args()
+
+    tests = {name: test for name, test in TESTS.items() if not args.pattern or args.pattern in name}
+    start = time.perf_counter()
+    passed = 0
+    for name, test in tests.items():
+        ok, error = run_test(test)
+        passed += ok
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+        if error:
+            print(error)
+
+    print(f"\n{passed}/{len(tests)} passed in {time.perf_counter() - start:.2f} s")
+    if passed != len(tests):
+        sys.exit(1)
@@ -0,0 +1,121 @@
+import argparse
+import logging
+import sys
+import time
+import traceback
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT / "exts"))
+
+from coding_guidelines import std_index, std_role  # noqa: E402
+
+DOCS = "https://doc.rust-lang.org/stable"
+
+# The committed index, which the :std: roles of the guidelines are resolved against
+INDEX = std_index.StdIndex.load(ROOT / "src" / "std_items.json")
+
+
+def resolve(target):
+    return INDEX.resolve(target, DOCS)
+
+
+def test_resolves_items():
+    assert resolve("core::mem::transmute") == f"{DOCS}/core/mem/fn.transmute.html"
+    assert resolve("std::vec") == f"{DOCS}/std/vec/index.html"
+    assert resolve("vec!") == f"{DOCS}/std/macro.vec.html"
+    assert resolve("Option") == f"{DOCS}/std/option/enum.Option.html"
+    assert resolve("Vec<u8>") == f"{DOCS}/std/vec/struct.Vec.html"
+
+
+def test_links_members_with_the_anchor_of_their_kind():
+    assert resolve("Vec::push") == f"{DOCS}/std/vec/struct.Vec.html#method.push"
+    assert resolve("std::vec::Vec::push()") == f"{DOCS}/std/vec/struct.Vec.html#method.push"
+    # Provided and required methods of a trait
+    assert resolve("Iterator::map") == f"{DOCS}/std/iter/trait.Iterator.html#method.map"
+    assert resolve("Iterator::next") == f"{DOCS}/std/iter/trait.Iterator.html#tymethod.next"
+    assert resolve("Iterator::Item") == f"{DOCS}/std/iter/trait.Iterator.html#associatedtype.Item"
+    assert resolve("Option::Some") == f"{DOCS}/std/option/enum.Option.html#variant.Some"
+    assert resolve("core::ops::Range::start") == f"{DOCS}/core/ops/struct.Range.html#structfield.start"
+    assert resolve("i32::MAX") == f"{DOCS}/std/i32/constant.MAX.html"
+    assert resolve("f64::EPSILON") == f"{DOCS}/std/f64/constant.EPSILON.html"
+    assert resolve("u32::checked_add") == f"{DOCS}/std/primitive.u32.html#method.checked_add"
+
+
+def test_does_not_resolve_members_a_type_does_not_have():
+    assert resolve("Vec::pussh") is None
+    assert resolve("std::vec::Vec::nonexistent") is None
+    # Methods of trait implementations are documented with the trait
+    assert resolve("Vec::clone") is None
+    assert resolve("Clone::clone") == f"{DOCS}/std/clone/trait.Clone.html#tymethod.clone"
+    # Only a single member can be linked to
+    assert resolve("Option::Some::foo") is None
+
+
+def test_does_not_resolve_unknown_paths():
+    assert resolve("core::mem::transmutte") is None
+    assert resolve("NoSuchType") is None
+    assert resolve("") is None
+
+
+def test_parses_the_own_members_of_a_page():
+    html = (
+        '<section id="variant.Some"></section><section id="method.map"></section>'
+        '<section id="method.map-1"></section><section id="structfield.len"></section>'
+        '<section id="method.len"></section>'
+        '<h2 id="trait-implementations">Trait Implementations</h2><section id="method.clone"></section>'
+    )
+    # The method wins over the field of the same name, and trait implementations are left out
+    assert std_index.parse_members(html) == ["method.len", "method.map", "variant.Some"]
+
+
+def test_role_warns_about_unresolved_targets():
+    env = SimpleNamespace(
+        app=SimpleNamespace(std_index=INDEX), config=SimpleNamespace(spec_std_docs_url=f"{DOCS}/std"),
+    )
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    std_role.logger.addHandler(handler)
+    try:
+        assert std_role.resolve_std_url(env, "Vec::push", "doc.rst:1") == f"{DOCS}/std/vec/struct.Vec.html#method.push"
+        assert not records
+        assert std_role.resolve_std_url(env, "Vec::pussh", "doc.rst:2") is None
+    finally:
+        std_role.logger.removeHandler(handler)
+    assert [record.getMessage() for record in records] == [
+        f"doc.rst:2: std reference 'Vec::pussh' not found in the std item index (Rust {INDEX.rust_version}), "
+        "linking to the search page instead"
+    ], records
+
+
+TESTS = {name: test for name, test in globals().items() if name.startswith("test_")}
+
+
+def run_test(test):
+    try:
+        test()
+        return True, ""
+    except Exception:
+        return False, traceback.format_exc()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the tests of the std item index.")
+    parser.add_argument("-k", dest="pattern", help="Only run the tests whose name contains this.")
+    args = parser.parse_args()
+
+    tests = {name: test for name, test in TESTS.items() if not args.pattern or args.pattern in name}
+    start = time.perf_counter()
+    passed = 0
+    for name, test in tests.items():
+        ok, error = run_test(test)
+        passed += ok
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+        if error:
+            print(error)
+
+    print(f"\n{passed}/{len(tests)} passed in {time.perf_counter() - start:.2f} s")
+    if passed != len(tests):
+        sys.exit(1)
@@ -0,0 +1,272 @@
+#!/usr/bin/env -S uv run
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Benchmark how the build scales with the number of guidelines.
+
+For every size N a scratch copy of ``src`` is made in which N synthetic
+guidelines are appended to every chapter of the coding guidelines. The
+guidelines are generated with ``guideline_rst_template`` and reference real
+FLS paragraph IDs sampled from the spec lock of ``src``. Each tree is built offline
+with ``--define profile=1`` and the per-phase wall time and peak RSS of the
+timing report are collected.
+
+Scaling is summarised as the ratio between the largest and the smallest size
+for the total build time, the peak RSS and every phase. The run fails if a ratio exceeds
+the recorded baseline by more than the tolerance; record a new baseline with
+``--update-baseline``.
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from generate_guideline_templates import guideline_rst_template  # noqa: E402
+
+
+def load_module(name, path):
+    """Load a module of the extension by path, without importing the package (and Sphinx)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+spec_lock_index = load_module(
+    "coding_guidelines_spec_lock_index", ROOT / "exts" / "coding_guidelines" / "spec_lock_index.py"
+)
+
+DEFAULT_SIZES = [1, 10, 40]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 1.5
+
+# Phases shorter than this at the largest size are too noisy to compare
+MIN_COMPARED_SECONDS = 0.25
+
+CATEGORIES = ["mandatory", "required", "advisory"]
+DECIDABILITIES = ["decidable", "undecidable"]
+SCOPES = ["module", "crate", "system"]
+TAGS = ["security", "performance", "readability", "reduce-human-error", "numerics"]
+
+
+def sample_fls_ids(directory, rng, count):
+    """Sample ``count`` FLS paragraph IDs from the spec lock file in a directory, plain or compressed"""
+    data = spec_lock_index.read_lock(spec_lock_index.find_lock(directory))
+    fls_ids = sorted(
+        paragraph["id"]
+        for document in data["documents"]
+        for section in document["sections"]
+        for paragraph in section["paragraphs"]
+        # guideline_rst_template lowercases the FLS ID
+        if paragraph["id"].startswith("fls_") and paragraph["id"] == paragraph["id"].lower()
+    )
+    return [rng.choice(fls_ids) for _ in range(count)]
+
+
+def synthetic_guideline(rng, number, fls_id):
+    """Return the RST of one synthetic guideline"""
+    return guideline_rst_template(
+        guideline_title=f"Synthetic guideline {number}",
+        category=rng.choice(CATEGORIES),
+        status="draft",
+        release_begin="1.85.0",
+        release_end="latest",
+        fls_id=fls_id,
+        decidability=rng.choice(DECIDABILITIES),
+        scope=rng.choice(SCOPES),
+        tags=rng.choice(TAGS),
+        amplification=f"Synthetic guideline number {number}, generated for benchmarking.",
+        rationale="Benchmarks need guidelines that look like the real ones.",
+        non_compliant_ex_prose="A non-compliant example.",
+        # Single-line code: the template only indents the first line of multi-line code
+        non_compliant_ex=f"fn non_compliant_{number}(x: u8) -> u8 {{ x + 1 }}",
+        compliant_example_prose="A compliant example.",
+        compliant_example=f"fn compliant_{number}(x: u8) -> Option<u8> {{ x.checked_add(1) }}",
+    )
+
+
+def make_corpus(dest, guidelines_per_chapter, seed):
+    """
+    Copy ``src`` to ``dest`` and append synthetic guidelines to every chapter.
+
+    Returns:
+        The number of generated guidelines
+    """
+    shutil.copytree(ROOT / "src", dest)
+    # generate_id uses the module-level random generator
+    random.seed(seed)
+    rng = random.Random(seed)
+
+    chapters = sorted(p for p in (dest / "coding-guidelines").glob("*.rst") if p.name != "index.rst")
+    fls_ids = sample_fls_ids(dest, rng, len(chapters) * guidelines_per_chapter)
+
+    number = 0
+    for chapter in chapters:
+        generated = []
+        for _ in range(guidelines_per_chapter):
+            generated.append(synthetic_guideline(rng, number, fls_ids[number]))
+            number += 1
+        with open(chapter, "a", encoding="utf-8") as f:
+            f.write("\n" + "\n".join(generated))
+    return number
+
+
+def run_build(workdir, jobs):
+    """Build the corpus in ``workdir`` offline and return the timing report"""
+    build = workdir / "build"
+    args = [
+        sys.executable, "-m", "sphinx",
+        "-b", "html",
+        "-d", build / "doctrees",
+        "-j", str(jobs),
+        "--define", "offline=1",
+        "--define", "profile=1",
+        "-W", "--keep-going", "-q",
+        workdir / "src",
+        build / "html",
+    ]
+    start = time.perf_counter()
+    subprocess.run(args, check=True)
+    wall = time.perf_counter() - start
+
+    with open(build / "profile.json", "r", encoding="utf-8") as f:
+        report = json.load(f)
+    report["wall_seconds"] = wall
+    return report
+
+
+def benchmark_size(guidelines_per_chapter, seed, jobs, repeat):
+    """Benchmark one corpus size, keeping the fastest of ``repeat`` clean builds"""
+    with tempfile.TemporaryDirectory(prefix="guidelines-bench-") as tmp:
+        workdir = Path(tmp)
+        count = make_corpus(workdir / "src", guidelines_per_chapter, seed)
+        # conf.py loads the extension from ../exts
+        (workdir / "exts").symlink_to(ROOT / "exts", target_is_directory=True)
+        best = None
+        for _ in range(repeat):
+            shutil.rmtree(workdir / "build", ignore_errors=True)
+            report = run_build(workdir, jobs)
+            if best is None or report["wall_seconds"] < best["wall_seconds"]:
+                best = report
+
+    return {
+        "guidelines_per_chapter": guidelines_per_chapter,
+        "generated_guidelines": count,
+        "wall_seconds": round(best["wall_seconds"], 3),
+        "peak_rss_kb": best["peak_rss_kb"],
+        "phases": {
+            name: {"seconds": round(phase["seconds"], 3), "peak_rss_kb": phase["peak_rss_kb"]}
+            for name, phase in best["phases"].items()
+        },
+    }
+
+
+def scaling_ratios(results):
+    """Ratios of the largest to the smallest size, for the wall time, peak RSS and every phase"""
+    smallest, largest = results[0], results[-1]
+    ratios = {"wall": largest["wall_seconds"] / max(smallest["wall_seconds"], 1e-6)}
+    if smallest["peak_rss_kb"] and largest["peak_rss_kb"]:
+        ratios["peak_rss"] = largest["peak_rss_kb"] / smallest["peak_rss_kb"]
+    for name, phase in largest["phases"].items():
+        if phase["seconds"] < MIN_COMPARED_SECONDS or name not in smallest["phases"]:
+            continue
+        ratios[name] = phase["seconds"] / max(smallest["phases"][name]["seconds"], 1e-6)
+    return {name: round(ratio, 3) for name, ratio in ratios.items()}
+
+
+def compare_to_baseline(ratios, baseline, tolerance):
+    """Return a list of messages for the ratios that regressed past the baseline"""
+    failures = []
+    for name, ratio in ratios.items():
+        expected = baseline["ratios"].get(name)
+        if expected is not None and ratio > expected * tolerance:
+            failures.append(f"{name}: scaling ratio {ratio:.2f} exceeds baseline {expected:.2f} x {tolerance}")
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark how the build scales with the number of guidelines")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: sorted(int(size) for size in value.split(",")),
+        default=DEFAULT_SIZES,
+        help=f"comma-separated numbers of guidelines per chapter (default: {','.join(map(str, DEFAULT_SIZES))})",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated corpus (default: 0)")
+    parser.add_argument("-j", "--jobs", default="1", help="parallel jobs passed to sphinx-build (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="builds per size, the fastest is kept (default: 1)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"allowed factor over the baseline ratios (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="record the measured ratios as the new baseline")
+    parser.add_argument("-o", "--output", type=Path, help="write the full results as JSON to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if len(args.sizes) < 2:
+        sys.exit("error: --sizes needs at least two sizes to measure scaling")
+
+    results = []
+    for size in args.sizes:
+        print(f"Building with {size} synthetic guidelines per chapter...", flush=True)
+        result = benchmark_size(size, args.seed, args.jobs, args.repeat)
+        results.append(result)
+        phases = ", ".join(f"{name} {phase['seconds']:.2f}s" for name, phase in result["phases"].items())
+        print(
+            f"  {result['generated_guidelines']} guidelines: {result['wall_seconds']:.2f}s, "
+            f"peak RSS {result['peak_rss_kb']} KiB ({phases})"
+        )
+
+    ratios = scaling_ratios(results)
+    print("Scaling ratios (largest / smallest size):")
+    for name, ratio in ratios.items():
+        print(f"  {name}: {ratio:.2f}")
+
+    summary = {"sizes": args.sizes, "seed": args.seed, "jobs": args.jobs, "results": results, "ratios": ratios}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"sizes": args.sizes, "seed": args.seed, "ratios": ratios}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update-baseline to record one")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("sizes") != args.sizes:
+        print(f"warning: baseline was recorded for sizes {baseline.get('sizes')}, not {args.sizes}")
+
+    failures = compare_to_baseline(ratios, baseline, args.tolerance)
+    if failures:
+        print("Scaling regressed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("Scaling within baseline")
+
+
+if __name__ == "__main__":
+    main()
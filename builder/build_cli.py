@@ -9,17 +9,27 @@
 
 from pathlib import Path
 import argparse
+import os
 import subprocess
 import sys
-import requests
-import json
 import time
 
 # Automatically watch the following extra directories when --serve is used.
 EXTRA_WATCH_DIRS = ["exts", "themes"]
 
 SPEC_CHECKSUM_URL = "https://rust-lang.github.io/fls/paragraph-ids.json"
-SPEC_LOCKFILE = "spec.lock"
+SPEC_LOCK_FORMATS = ("json", "xz", "gz")
+# Snapshots of every spec.lock written by --update-spec-lock-file, relative to the root
+SPEC_LOCK_HISTORY_DIR = ".spec-lock-history"
+# Indexes of the lock file, relative to the root; the doctree directory of make.py builds, so
+# that the build opens the index written here
+SPEC_LOCK_INDEX_DIR = Path("build") / "doctrees" / "spec_lock_index"
+
+# Results of --check-links, relative to the build directory
+LINK_CHECK_CACHE = "link-check-cache.json"
+
+STD_DOCS_URL = "https://doc.rust-lang.org/stable"
+STD_INDEX_FILE = "std_items.json"
 
 def build_docs(
     root: Path,
@@ -29,6 +39,9 @@ def build_docs(
     debug: bool,
     offline: bool,
     spec_lock_consistency_check: bool,
+    profile: bool = False,
+    cprofile: bool = False,
+    metrics: bool = False,
 ) -> Path:
     """
     Builds the Sphinx documentation with the specified options.
@@ -41,6 +54,9 @@ def build_docs(
         debug: Whether to enable debug mode.
         offline: Whether to build in offline mode.
         spec_lock_consistency_check: Whether to check spec lock consistency.
+        profile: Whether to time the extension hooks and build phases.
+        cprofile: Whether to additionally capture a cProfile of the build.
+        metrics: Whether to export the build metrics.
 
     Returns:
         Path: The path to the generated documentation.
@@ -72,6 +88,12 @@ def build_docs(
         conf_opt_values.append("offline=1")
     if debug:  
         conf_opt_values.append("debug=1")
+    if profile or cprofile:
+        conf_opt_values.append("profile=1")
+    if cprofile:
+        conf_opt_values.append("profile_cprofile=1")
+    if metrics:
+        conf_opt_values.append("metrics=1")
 
     # Only add the --define argument if there are options to define
     if conf_opt_values:
@@ -109,34 +131,192 @@ def build_docs(
 
     timer_end = time.perf_counter()
     print(f"\nBuild finished in {timer_end - timer_start:.2f} seconds.")
+    if profile or cprofile:
+        print(f"Timing report written to {dest / 'profile.json'}")
+    if metrics:
+        print(f"Metrics written to {dest / 'metrics.json'} and {dest / 'metrics.txt'}")
     return dest / builder
 
-def update_spec_lockfile(spec_checksum_location, lockfile_location):
+def import_extension_module(name):
+    # The lock file and std index helpers live with the extension
+    import importlib
+
+    extension_dir = str(Path(__file__).resolve().parent.parent / "exts")
+    if extension_dir not in sys.path:
+        sys.path.append(extension_dir)
+    return importlib.import_module(f"coding_guidelines.{name}")
+
+def import_spec_lock_index():
+    return import_extension_module("spec_lock_index")
+
+def open_spec_lock_history(history_location):
+    return import_extension_module("spec_lock_history").SpecLockHistory(history_location)
+
+def update_spec_lockfile(spec_checksum_location, lockfile_location, index_location, history_location=None):
+    # Deferred so that building or serving does not pay for importing requests
+    import requests
+    import shutil
+    import tempfile
 
+    lockfile_location = Path(lockfile_location)
+    download_location = None
     try:
-        response = requests.get(spec_checksum_location, stream=True)
+        spec_lock_index = import_spec_lock_index()
+        history = open_spec_lock_history(history_location) if history_location else None
 
-        response.raise_for_status()
+        # Keep the lock being replaced, in case it is not in the history yet
+        if history is not None and lockfile_location.exists():
+            name, added = history.add(spec_lock_index.read_lock(lockfile_location), source=str(lockfile_location))
+            if added:
+                print(f"-- recorded the current lock as snapshot {name} --")
 
-        with open(lockfile_location, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    file.write(chunk)
+        # Download next to the lock, so that a failed download leaves the lock untouched
+        # and the final rename stays on the same file system
+        with tempfile.NamedTemporaryFile(
+            dir=lockfile_location.parent, prefix=f".{lockfile_location.name}.", suffix=".tmp", delete=False
+        ) as file:
+            download_location = Path(file.name)
+            response = requests.get(spec_checksum_location, stream=True, timeout=60)
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=65536):
+                file.write(chunk)
 
-        with open(lockfile_location, 'r') as file:
-            data = json.load(file)
+        data = spec_lock_index.read_lock(download_location)
+        spec_lock_index.validate_lock(data)
 
         print("-- read in --")
 
-        with open(lockfile_location, 'w') as outfile:
-            json.dump(data, outfile, indent=4, sort_keys=True)
+        changes = None
+        if lockfile_location.exists():
+            changes = spec_lock_index.lock_changes(spec_lock_index.SpecLockIndex.open(lockfile_location, index_location), data)
+
+        # Canonical form, with sorted keys and indented or compressed depending on the file
+        # extension, renamed over the lock in one step
+        with open(download_location, 'wb') as file:
+            file.write(spec_lock_index.encode_lock(data, spec_lock_index.lock_format(lockfile_location)))
+            file.flush()
+            os.fsync(file.fileno())
+        # NamedTemporaryFile creates the file readable by its owner only, keep the mode of the lock
+        if lockfile_location.exists():
+            shutil.copymode(lockfile_location, download_location)
+        else:
+            os.chmod(download_location, 0o644)
+        os.replace(download_location, lockfile_location)
 
         print("-- wrote back out --")
 
+        # Regenerate the index the extension reads the lock file through
+        spec_lock_index.write_index(lockfile_location, index_location, data)
+
+        print("-- wrote index --")
+
+        if history is not None:
+            name, added = history.add(data, source=spec_checksum_location)
+            print(f"-- recorded snapshot {name} --" if added else f"-- unchanged since snapshot {name} --")
+
+        if changes is not None:
+            for kind in ("added", "removed", "changed"):
+                for fls_id in changes[kind]:
+                    print(f"{kind:<8} {fls_id}")
+            print(
+                f"{len(changes['added'])} paragraphs added, {len(changes['removed'])} removed, "
+                f"{len(changes['changed'])} changed"
+            )
+
+        return True
+
+    except Exception as e:
+        print(f"Error updating {lockfile_location} from {spec_checksum_location}: {e}")
+        return False
+
+    finally:
+        if download_location is not None:
+            download_location.unlink(missing_ok=True)
+
+def restore_spec_lockfile(history_location, version, lockfile_location, index_location):
+    try:
+        data = open_spec_lock_history(history_location).reconstruct(version)
+
+        spec_lock_index = import_spec_lock_index()
+        spec_lock_index.write_lock(lockfile_location, data)
+
+        print(f"-- restored snapshot {version} --")
+
+        spec_lock_index.write_index(lockfile_location, index_location, data)
+
+        print("-- wrote index --")
+
         return True
 
     except Exception as e:
-        print(f"Error downloading file: {e}")
+        print(f"Error restoring spec lock snapshot: {e}")
+        return False
+
+def convert_spec_lockfile(lockfile_location, fmt, index_location):
+    try:
+        spec_lock_index = import_spec_lock_index()
+        lockfile_location = Path(lockfile_location)
+        converted_location = lockfile_location.with_name(spec_lock_index.LOCK_NAMES[spec_lock_index.LOCK_FORMATS.index(fmt)])
+
+        data = spec_lock_index.read_lock(lockfile_location)
+        spec_lock_index.write_lock(converted_location, data, fmt)
+
+        print(f"-- converted {lockfile_location.name} to {converted_location.name} --")
+
+        spec_lock_index.write_index(converted_location, index_location, data)
+
+        print("-- wrote index --")
+
+        # Only one form of the lock may exist, or the extension would pick the wrong one
+        if converted_location != lockfile_location:
+            lockfile_location.unlink()
+            spec_lock_index.index_path_for(lockfile_location, index_location).unlink(missing_ok=True)
+
+        return converted_location
+
+    except Exception as e:
+        print(f"Error converting spec lock file: {e}")
+        return None
+
+def list_spec_lock_history(history_location):
+    versions = open_spec_lock_history(history_location).versions()
+    if not versions:
+        print(f"No spec lock snapshots in {history_location}")
+    for manifest in versions:
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(manifest["created"]))
+        print(f"{manifest['name']}  {created} UTC  {manifest['paragraphs']} paragraphs  {manifest['source'] or ''}")
+
+def print_spec_lock_diff(history_location, old, new):
+    diff = open_spec_lock_history(history_location).diff(old, new)
+    for kind in ("added", "removed"):
+        for paragraph in diff[kind]:
+            print(f"{kind:<8} {paragraph['id']}  {paragraph['number']}")
+    for kind in ("changed", "moved"):
+        for change in diff[kind]:
+            old_paragraph, new_paragraph = change["old"], change["new"]
+            print(f"{kind:<8} {new_paragraph['id']}  {old_paragraph['number']} -> {new_paragraph['number']}")
+    print(
+        f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+        f"{len(diff['changed'])} changed, {len(diff['moved'])} moved between {old} and {new}"
+    )
+
+def update_std_index(std_docs_location, index_location):
+
+    try:
+        std_index = import_extension_module("std_index")
+
+        index = std_index.build_std_index(str(std_docs_location))
+
+        print(f"-- read std items of Rust {index['rust_version']} --")
+
+        std_index.write_std_index(index, index_location)
+
+        print("-- wrote std item index --")
+
+        return True
+
+    except Exception as e:
+        print(f"Error building std item index: {e}")
         return False
 
 def main(root):
@@ -163,6 +343,48 @@ def main(root):
         help="update spec.lock file",
         action="store_true"
     )
+    parser.add_argument(
+        "--spec-lock-url",
+        help=f"where --update-spec-lock-file downloads the paragraph IDs of the specification from (default: {SPEC_CHECKSUM_URL})",
+        default=SPEC_CHECKSUM_URL,
+    )
+    parser.add_argument(
+        "--convert-spec-lock",
+        help="rewrite spec.lock as indented JSON (json) or as compact JSON compressed with xz or gzip (xz, gz)",
+        choices=SPEC_LOCK_FORMATS,
+    )
+    parser.add_argument(
+        "--spec-lock-history-dir",
+        help=f"where --update-spec-lock-file records snapshots of spec.lock (default: {SPEC_LOCK_HISTORY_DIR})",
+        type=Path,
+        default=root / SPEC_LOCK_HISTORY_DIR,
+    )
+    parser.add_argument(
+        "--list-spec-lock-history",
+        help="list the recorded spec.lock snapshots and exit",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--diff-spec-lock",
+        help="show the paragraphs added, removed, changed or moved between two spec.lock snapshots and exit",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+    )
+    parser.add_argument(
+        "--restore-spec-lock",
+        help="replace spec.lock with a recorded snapshot",
+        metavar="SNAPSHOT",
+    )
+    parser.add_argument(
+        "--update-std-index",
+        help="update the std item index used to link :std: references",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--std-docs",
+        help=f"rustdoc output of the standard library to index, as a directory (e.g. the parent of `rustup doc --path`) or URL (default: {STD_DOCS_URL})",
+        default=STD_DOCS_URL,
+    )
     group.add_argument(
         "-s",
         "--serve",
@@ -170,7 +392,9 @@ def main(root):
         action="store_true",
     )
     group.add_argument(
-        "--check-links", help="Check whether all links are valid", action="store_true"
+        "--check-links",
+        help="build the HTML and check its external links, caching the results in build/link-check-cache.json",
+        action="store_true",
     )
     group.add_argument(
         "--xml", help="Generate Sphinx XML rather than HTML", action="store_true"
@@ -186,12 +410,76 @@ def main(root):
         help="Debug mode for the extensions, showing exceptions",
         action="store_true",
     )
+    parser.add_argument(
+        "--link-check-ttl",
+        help="hours for which --check-links trusts a link that worked before (default: 24, 0 to check every link)",
+        type=float,
+        default=24,
+    )
+    parser.add_argument(
+        "--profile",
+        help="time the extension hooks and build phases, writing build/profile.json",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cprofile",
+        help="like --profile, and also capture a cProfile of the build in build/profile.prof",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="export the build metrics to build/metrics.json and, as OpenMetrics, build/metrics.txt",
+        action="store_true",
+    )
     args = parser.parse_args()
 
+    if args.list_spec_lock_history:
+        list_spec_lock_history(args.spec_lock_history_dir)
+        return
+
+    if args.diff_spec_lock:
+        try:
+            print_spec_lock_diff(args.spec_lock_history_dir, *args.diff_spec_lock)
+        except KeyError as e:
+            exit(f"error: {e.args[0]}")
+        return
+
+    if args.convert_spec_lock or args.update_spec_lock_file or args.restore_spec_lock:
+        # spec.lock, spec.lock.xz or spec.lock.gz, whichever the checkout has
+        lockfile_location = import_spec_lock_index().find_lock(root / "src")
+
+    if args.convert_spec_lock:
+        lockfile_location = convert_spec_lockfile(lockfile_location, args.convert_spec_lock, root / SPEC_LOCK_INDEX_DIR)
+        if lockfile_location is None:
+            exit(1)
+
     if args.update_spec_lock_file:
-        update_spec_lockfile(SPEC_CHECKSUM_URL, root / "src" / SPEC_LOCKFILE)
+        if not update_spec_lockfile(
+            args.spec_lock_url, lockfile_location, root / SPEC_LOCK_INDEX_DIR, args.spec_lock_history_dir
+        ):
+            exit(1)
+
+    if args.restore_spec_lock:
+        if not restore_spec_lockfile(
+            args.spec_lock_history_dir, args.restore_spec_lock, lockfile_location, root / SPEC_LOCK_INDEX_DIR
+        ):
+            exit(1)
+
+    if args.update_std_index:
+        if not update_std_index(args.std_docs, root / "src" / STD_INDEX_FILE):
+            exit(1)
 
     rendered = build_docs(
-        root, "xml" if args.xml else "html", args.clear, args.serve, args.debug, args.offline, not args.ignore_spec_lock_diff, 
+        root, "xml" if args.xml else "html", args.clear, args.serve, args.debug, args.offline, not args.ignore_spec_lock_diff,
+        args.profile, args.cprofile, args.metrics,
     )
 
+    if args.check_links:
+        from . import link_check
+
+        links, results, checked = link_check.check_links(
+            rendered, root / "build" / LINK_CHECK_CACHE, ttl=args.link_check_ttl * 60 * 60
+        )
+        if not link_check.report(links, results, checked):
+            exit(1)
+
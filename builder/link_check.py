@@ -0,0 +1,192 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Check the external links of the rendered guidelines.
+
+Every http(s) link of the built HTML is collected and deduplicated, ignoring
+fragments, and the URLs are checked concurrently: an asyncio task per URL runs
+the request on a bounded thread pool, and a semaphore per host limits the
+requests open to any one server.
+
+Results are kept in a JSON cache. A URL that worked is not checked again until
+its entry is older than the TTL; a broken URL is checked on every run, so a
+fixed link or a server that came back is noticed right away.
+"""
+
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urldefrag, urlsplit
+
+CACHE_FORMAT = 1
+
+# Seconds a working URL stays in the cache before it is checked again
+DEFAULT_TTL = 24 * 60 * 60
+# Requests open at the same time, overall and to a single host
+DEFAULT_CONCURRENCY = 32
+DEFAULT_PER_HOST = 4
+# Seconds to wait for a server to answer
+DEFAULT_TIMEOUT = 20
+
+USER_AGENT = "safety-critical-rust-coding-guidelines-linkcheck"
+
+
+class LinkCollector(HTMLParser):
+    """Collect the external links of an HTML page"""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        href = dict(attrs).get("href") or ""
+        if href.startswith(("http://", "https://")):
+            self.urls.add(urldefrag(href).url)
+
+
+def collect_links(html_dir):
+    """
+    Collect the external links of the built HTML.
+
+    Returns:
+        Dict of URL -> sorted list of the pages linking to it, relative to html_dir
+    """
+    html_dir = Path(html_dir)
+    links = {}
+    for page in sorted(html_dir.rglob("*.html")):
+        collector = LinkCollector()
+        collector.feed(page.read_text(encoding="utf-8"))
+        for url in collector.urls:
+            links.setdefault(url, []).append(page.relative_to(html_dir).as_posix())
+    return links
+
+
+def check_url(url, timeout=DEFAULT_TIMEOUT):
+    """
+    Request a URL, following redirects.
+
+    A HEAD request is tried first; servers that reject it are asked again with GET,
+    of which only the headers are read.
+
+    Returns:
+        Tuple of (HTTP status or None, error message or None if the URL works)
+    """
+    for method in ("HEAD", "GET"):
+        request = urllib.request.Request(url, method=method, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            if method == "HEAD":
+                continue
+            return e.code, f"HTTP {e.code} {e.reason}"
+        except urllib.error.URLError as e:
+            return None, str(e.reason)
+        except (OSError, ValueError) as e:
+            return None, str(e) or type(e).__name__
+
+
+def load_cache(cache_path):
+    """Return the cached results as a dict of URL -> entry, or an empty dict"""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("format") != CACHE_FORMAT:
+        return {}
+    return cache.get("urls", {})
+
+
+def save_cache(cache_path, entries):
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": CACHE_FORMAT, "urls": entries}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def is_fresh(entry, now, ttl):
+    """Whether a cached result can be used instead of checking the URL again"""
+    return entry is not None and entry["error"] is None and now - entry["checked"] < ttl
+
+
+async def check_urls(urls, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT):
+    """
+    Check URLs concurrently.
+
+    Returns:
+        Dict of URL -> cache entry with the 'status', 'error' and 'checked' time of the check
+    """
+    loop = asyncio.get_running_loop()
+    host_limits = {}
+    results = {}
+
+    async def check(url):
+        limit = host_limits.setdefault(urlsplit(url).netloc.lower(), asyncio.Semaphore(per_host))
+        async with limit:
+            status, error = await loop.run_in_executor(executor, check_url, url, timeout)
+        results[url] = {"status": status, "error": error, "checked": time.time()}
+
+    # The pool bounds the requests open overall
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(check(url) for url in urls))
+    return results
+
+
+def check_links(html_dir, cache_path, ttl=DEFAULT_TTL, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                timeout=DEFAULT_TIMEOUT):
+    """
+    Check the external links of the built HTML, reusing cached results that have not expired.
+
+    Args:
+        html_dir: The HTML output directory
+        cache_path: The JSON file holding the results of previous checks
+        ttl: Seconds a working URL is not checked again for
+        concurrency: Requests open at the same time
+        per_host: Requests open at the same time to a single host
+        timeout: Seconds to wait for a server to answer
+
+    Returns:
+        Tuple of (URL -> pages linking to it, URL -> cache entry, number of URLs checked in this run)
+    """
+    links = collect_links(html_dir)
+    cache = load_cache(cache_path)
+    now = time.time()
+    expired = sorted(url for url in links if not is_fresh(cache.get(url), now, ttl))
+
+    if expired:
+        cache.update(asyncio.run(check_urls(expired, concurrency, per_host, timeout)))
+    # Only keep the URLs the pages still link to, so that the cache does not grow forever
+    results = {url: cache[url] for url in links}
+    save_cache(cache_path, results)
+    return links, results, len(expired)
+
+
+def report(links, results, checked):
+    """
+    Print the broken links and the pages they are on.
+
+    Returns:
+        Whether all links work
+    """
+    broken = sorted(url for url, entry in results.items() if entry["error"] is not None)
+    for url in broken:
+        print(f"broken   {url}: {results[url]['error']}")
+        for page in links[url]:
+            print(f"           in {page}")
+    print(
+        f"{len(links)} external links, {checked} checked, {len(links) - checked} from the cache: "
+        f"{len(broken)} broken"
+    )
+    return not broken
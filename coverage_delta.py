@@ -0,0 +1,286 @@
+#!/usr/bin/env -S uv run
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Show how FLS coverage changes between two states of the guidelines.
+
+A state is the guidelines, ``spec.lock`` and ``spec_ignore_list.txt`` of
+``src/`` at a git revision or in the working tree, optionally with another
+lock file. Coverage is computed for both states with the same functions as
+the build (``insert_fls_coverage`` and ``calculate_fls_coverage``), without
+running Sphinx, and the change is reported overall, per chapter and per FLS
+ID, as text or JSON.
+
+    ./coverage_delta.py --base origin/main            # working tree vs. main
+    ./coverage_delta.py --base v1 --head v2           # two revisions
+    ./coverage_delta.py --base-lock old.lock --head-lock src/spec.lock
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import lint_guidelines
+
+ROOT_DIR = Path(__file__).resolve().parent
+SRC_DIR = ROOT_DIR / "src"
+
+# Loaded by path like lint_guidelines does, importing the package would import Sphinx
+spec_lock_index = lint_guidelines.spec_lock_index
+fls_coverage = lint_guidelines.load_module(
+    "coding_guidelines_fls_coverage", lint_guidelines.EXTENSION_DIR / "fls_coverage.py"
+)
+
+# Files of src/ that a state is computed from, besides the RST sources;
+# the lock file is kept as bytes, since it may be compressed
+LOCK_FILES = spec_lock_index.LOCK_NAMES
+IGNORE_LIST_FILE = "spec_ignore_list.txt"
+
+WORKTREE = "the working tree"
+
+
+def read_worktree(src_dir):
+    """Return a dict of path relative to src -> contents of the files a state is computed from"""
+    files = {}
+    for path in sorted(src_dir.rglob("*.rst")):
+        files[path.relative_to(src_dir).as_posix()] = path.read_text(encoding="utf-8")
+    if (src_dir / IGNORE_LIST_FILE).exists():
+        files[IGNORE_LIST_FILE] = (src_dir / IGNORE_LIST_FILE).read_text(encoding="utf-8")
+    for name in LOCK_FILES:
+        if (src_dir / name).exists():
+            files[name] = (src_dir / name).read_bytes()
+    return files
+
+
+def read_revision(revision, src_dir):
+    """Like read_worktree, for a git revision; all files are read by a single git cat-file"""
+    prefix = src_dir.relative_to(ROOT_DIR).as_posix()
+    listing = subprocess.run(
+        ["git", "ls-tree", "-r", "-z", "--name-only", revision, "--", prefix],
+        cwd=ROOT_DIR, capture_output=True, check=True,
+    ).stdout.decode("utf-8")
+    paths = [
+        path for path in listing.split("\0")
+        if path.endswith(".rst") or path[len(prefix) + 1:] in (IGNORE_LIST_FILE, *LOCK_FILES)
+    ]
+
+    batch = subprocess.run(
+        ["git", "cat-file", "--batch"],
+        cwd=ROOT_DIR, input="".join(f"{revision}:{path}\n" for path in paths).encode("utf-8"),
+        capture_output=True, check=True,
+    ).stdout
+
+    # Each object is "<sha> <type> <size>\n<contents>\n"
+    files = {}
+    offset = 0
+    for path in paths:
+        header_end = batch.index(b"\n", offset)
+        size = int(batch[offset:header_end].split()[2])
+        contents = batch[header_end + 1:header_end + 1 + size]
+        name = path[len(prefix) + 1:]
+        files[name] = contents if name in LOCK_FILES else contents.decode("utf-8")
+        offset = header_end + 1 + size + 1
+    return files
+
+
+def coverage_state(files, lock_path=None):
+    """
+    Compute the FLS coverage of a state.
+
+    Args:
+        files: Files of the state, as returned by read_worktree or read_revision
+        lock_path: Lock file to use instead of the state's own, plain or compressed
+
+    Returns:
+        Tuple of (FLS IDs with their coverage metadata, coverage statistics)
+
+    Raises:
+        ValueError: if the state has no lock file and none is given, or it cannot be parsed
+    """
+    if lock_path is not None:
+        lock_data = spec_lock_index.read_lock(lock_path)
+    else:
+        lock_name = next((name for name in LOCK_FILES if name in files), None)
+        if lock_name is None:
+            raise ValueError(f"no spec lock in src/ (looked for {', '.join(LOCK_FILES)})")
+        lock_data = spec_lock_index.decode_lock(files[lock_name])
+    fls_ids = spec_lock_index.parse_fls_paragraph_ids(lock_data)
+
+    guidelines = {}
+    for path, text in files.items():
+        if path.endswith(".rst"):
+            for guideline in lint_guidelines.parse_needs_text(text, path[: -len(".rst")]):
+                if guideline.get("id"):
+                    guidelines[guideline["id"]] = {"fls": guideline.get("fls")}
+
+    ignore_list = fls_coverage.parse_fls_ignore_list(files.get(IGNORE_LIST_FILE, "").splitlines())
+    fls_coverage.insert_fls_coverage(guidelines, fls_ids)
+    return fls_ids, fls_coverage.calculate_fls_coverage(fls_ids, ignore_list)
+
+
+def fls_id_state(metadata):
+    """Coverage state of an FLS ID in one state: covered, uncovered, ignored or absent"""
+    if metadata is None:
+        return "absent"
+    if metadata["ignored"]:
+        return "ignored"
+    return "covered" if metadata["covered"] else "uncovered"
+
+
+def chapter_percentage(coverage, chapter):
+    """Coverage of a chapter in percent, or None if it is absent or all its IDs are ignored"""
+    value = coverage["chapter_coverage"].get(chapter)
+    return None if value in (None, "IGNORED") else round(value, 4)
+
+
+def coverage_delta(base, head):
+    """
+    Compare the coverage of two states.
+
+    Args:
+        base: The (FLS IDs, coverage) returned by coverage_state for the base
+        head: The same for the head
+
+    Returns:
+        The delta as a JSON-serialisable dict
+    """
+    base_ids, base_coverage = base
+    head_ids, head_coverage = head
+
+    def summary(coverage):
+        return {
+            "coverage": round(coverage["overall_coverage"], 4),
+            "total_ids": coverage["total_ids"],
+            "covered_ids": coverage["covered_ids"],
+            "ignored_ids": coverage["ignored_ids"],
+        }
+
+    chapters = []
+    for chapter in dict.fromkeys([*head_coverage["chapters"], *base_coverage["chapters"]]):
+        before, after = chapter_percentage(base_coverage, chapter), chapter_percentage(head_coverage, chapter)
+        if before != after:
+            chapters.append({
+                "chapter": chapter,
+                "base": before,
+                "head": after,
+                "delta": round((after or 0) - (before or 0), 4),
+            })
+
+    fls_ids = []
+    for fls_id in sorted(base_ids.keys() | head_ids.keys()):
+        before, after = base_ids.get(fls_id), head_ids.get(fls_id)
+        before_state, after_state = fls_id_state(before), fls_id_state(after)
+        before_needs = sorted((before or {}).get("covering_needs", []))
+        after_needs = sorted((after or {}).get("covering_needs", []))
+        if before_state == after_state and before_needs == after_needs:
+            continue
+        metadata = after or before
+        fls_ids.append({
+            "id": fls_id,
+            "chapter": metadata["chapter"],
+            "number": metadata["section_id"],
+            "section_title": metadata["section_title"],
+            "base": before_state,
+            "head": after_state,
+            "base_covering_needs": before_needs,
+            "head_covering_needs": after_needs,
+        })
+
+    return {
+        "base": summary(base_coverage),
+        "head": summary(head_coverage),
+        "chapters": chapters,
+        "fls_ids": fls_ids,
+    }
+
+
+def format_percentage(value):
+    return "n/a" if value is None else f"{value:.2f}%"
+
+
+def format_text(delta, base_name, head_name):
+    """Format the delta for reading"""
+    base, head = delta["base"], delta["head"]
+    lines = [
+        f"FLS coverage from {base_name} to {head_name}:",
+        f"  {format_percentage(base['coverage'])} -> {format_percentage(head['coverage'])} "
+        f"({head['coverage'] - base['coverage']:+.2f})",
+        f"  covered IDs: {base['covered_ids']} -> {head['covered_ids']}, "
+        f"ignored IDs: {base['ignored_ids']} -> {head['ignored_ids']}, "
+        f"total IDs: {base['total_ids']} -> {head['total_ids']}",
+    ]
+
+    if delta["chapters"]:
+        lines += ["", "Chapters:"]
+        for chapter in delta["chapters"]:
+            lines.append(
+                f"  {str(chapter['chapter']):>7}  {format_percentage(chapter['base'])} -> "
+                f"{format_percentage(chapter['head'])} ({chapter['delta']:+.2f})"
+            )
+
+    if delta["fls_ids"]:
+        lines += ["", "FLS IDs:"]
+        for entry in delta["fls_ids"]:
+            needs = []
+            if entry["head_covering_needs"]:
+                needs.append("by " + ", ".join(entry["head_covering_needs"]))
+            if entry["base_covering_needs"] and entry["base_covering_needs"] != entry["head_covering_needs"]:
+                needs.append("was by " + ", ".join(entry["base_covering_needs"]))
+            lines.append(
+                f"  {entry['id']}  {entry['number']:<10} {entry['section_title']}: {entry['base']} -> {entry['head']}"
+                + (f" ({'; '.join(needs)})" if needs else "")
+            )
+
+    if not delta["chapters"] and not delta["fls_ids"]:
+        lines += ["", "No coverage changes."]
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Show how FLS coverage changes between two states of the guidelines")
+    parser.add_argument("--base", default="HEAD", help="git revision of the base state (default: HEAD)")
+    parser.add_argument("--head", help="git revision of the head state (default: the working tree)")
+    parser.add_argument("--base-lock", type=Path, help="spec lock file to use for the base instead of its spec.lock")
+    parser.add_argument("--head-lock", type=Path, help="spec lock file to use for the head instead of its spec.lock")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="output format (default: text)")
+    parser.add_argument("-o", "--output", type=Path, help="write the output to this file instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    states = []
+    for revision, lock_path, lock_option in (
+        (args.base, args.base_lock, "--base-lock"),
+        (args.head, args.head_lock, "--head-lock"),
+    ):
+        try:
+            files = read_worktree(SRC_DIR) if revision is None else read_revision(revision, SRC_DIR)
+        except subprocess.CalledProcessError as e:
+            sys.exit(f"error: could not read {revision}: {e.stderr.decode('utf-8', 'replace').strip()}")
+        try:
+            states.append(coverage_state(files, lock_path))
+        except ValueError as e:
+            sys.exit(f"error: {revision or WORKTREE}: {e}; pass a lock file with {lock_option}")
+
+    delta = coverage_delta(*states)
+    if args.format == "json":
+        output = json.dumps(delta, indent=2)
+    else:
+        base_name = args.base_lock or args.base
+        head_name = args.head_lock or args.head or WORKTREE
+        output = format_text(delta, base_name, head_name)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
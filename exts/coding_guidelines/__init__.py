@@ -2,10 +2,16 @@
 # SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
   
 from . import fls_checks
+from . import fls_fetch
 from . import write_guidelines_ids
 from . import std_role
+from . import std_index
 from . import fls_linking
 from . import guidelines_checks 
+from . import validation
+from . import profiling
+from . import metrics
+from . import rules
 
 from .common import logger, get_tqdm, bar_format, logging 
 from sphinx.domains import Domain
@@ -19,12 +25,26 @@ class CodingGuidelinesDomain(Domain):
     directives = {}
     object_types = {}
     indices = {}
+    # Per-document state, stored with the environment. Every entry is keyed by docname
+    # so it can be dropped when the document is re-read and merged from parallel readers.
+    initial_data = {
+        'std_refs': {},  # docname -> targets of the :std: roles in the document
+    }
+    data_version = 1
     
     def get_objects(self):
         return []
+
+    def clear_doc(self, docname):
+        for per_document in self.data.values():
+            if isinstance(per_document, dict):
+                per_document.pop(docname, None)
     
-    def merge_domaindata(self, docnames, other):
-        pass  # No domain data to merge
+    def merge_domaindata(self, docnames, otherdata):
+        for key in self.initial_data:
+            for docname in docnames:
+                if docname in otherdata[key]:
+                    self.data[key][docname] = otherdata[key][docname]
 
 
 def on_build_finished(app, exception):
@@ -53,6 +73,12 @@ def setup(app):
         rebuild="env",  # Rebuild the environment when this changes
         types=[str],
     )
+    app.add_config_value(
+        name="std_items_index",
+        default="std_items.json",
+        rebuild="env",  # Path of the std item index, relative to the configuration directory
+        types=[str],
+    )
     app.add_config_value(name='debug', 
                          default=False, 
                          rebuild='env'
@@ -65,21 +91,51 @@ def setup(app):
                          rebuild='env')
     app.add_config_value(
         name='required_guideline_fields',
-        default=['release', 'fls', 'decidability', 'scope'],
+        default=list(rules.DEFAULT_REQUIRED_GUIDELINE_FIELDS),
         rebuild='env',
         types=[list],
     )
+    app.add_config_value(name='profile',
+                         default=False,
+                         rebuild='')
+    app.add_config_value(name='profile_cprofile',
+                         default=False,
+                         rebuild='')
+    app.add_config_value(name='metrics',
+                         default=False,
+                         rebuild='')
     if app.config.debug:
         logger.setLevel(logging.INFO)
         common.disable_tqdm = True  
     
-    app.connect('env-check-consistency', guidelines_checks.validate_required_fields)
-    app.connect('env-check-consistency', fls_checks.check_fls)
-    app.connect('build-finished', write_guidelines_ids.build_finished)
-    app.connect('build-finished', fls_linking.build_finished)
-    app.connect('build-finished', on_build_finished)
+    app.add_css_file('fls_links.css')
+
+    # Hooks are connected through profiling.connect so --profile can time them
+    profiling.register_phase_markers(app)
+    app.connect('config-inited', metrics.start_metrics, priority=0)
+    # Runs last, after the other build-finished hooks have been timed
+    app.connect('build-finished', metrics.write_metrics, priority=1000)
+    profiling.connect(app, 'config-inited', fls_linking.add_static_path)
+    profiling.connect(app, 'builder-inited', std_index.load_std_index)
+    profiling.connect(app, 'builder-inited', fls_fetch.prefetch_fls_json)
+    profiling.connect(app, 'env-get-outdated', std_index.outdated_std_refs)
+    # Checks run by the validation engine, in this order
+    validation.register_check(app, guidelines_checks.RequiredFieldsCheck)
+    validation.register_check(app, fls_checks.FlsCheck)
+
+    profiling.connect(app, 'env-check-consistency', validation.run_checks)
+    profiling.connect(app, 'env-check-consistency', write_guidelines_ids.update_checksums)
+    # Run after sphinx-needs has rendered the need nodes (default priority 500)
+    profiling.connect(app, 'doctree-resolved', fls_linking.add_fls_links, priority=600)
+    profiling.connect(app, 'build-finished', write_guidelines_ids.build_finished)
+    profiling.connect(app, 'build-finished', fls_linking.build_finished)
+    profiling.connect(app, 'build-finished', on_build_finished)
+    profiling.connect(app, 'build-finished', fls_fetch.discard_fls_prefetch)
     
     return {
         'version': '0.1',
         'parallel_read_safe': True,
+        # Per-document state lives in the domain data; the hooks that run while writing
+        # (doctree-resolved, build-finished) run in the main process.
+        'parallel_write_safe': True,
     }
@@ -1,11 +1,20 @@
 
-from tqdm import tqdm
 import logging
+import sys
 
 # This is a wrapper around tqdm that allows us to disable it with this global variable
 disable_tqdm = False 
+# Minimum number of seconds between two redraws of a progress bar
+progress_interval = 0.5
 def get_tqdm(**kwargs):
-    kwargs['disable'] = disable_tqdm
+    """
+    Create a progress bar. Bars are only drawn on a terminal, where they are redrawn
+    at most every ``progress_interval`` seconds; in CI logs they are disabled.
+    """
+    from tqdm import tqdm  # Deferred until the first progress bar
+
+    kwargs['disable'] = disable_tqdm or not sys.stderr.isatty()
+    kwargs.setdefault('mininterval', progress_interval)
     return tqdm(**kwargs)
 # Get the Sphinx logger
 logger = logging.getLogger('sphinx')
@@ -3,23 +3,65 @@
 
 
 from .common import logger, get_tqdm, bar_format, logging
+from .fls_coverage import calculate_fls_coverage, insert_fls_coverage, parse_fls_ignore_list
+from .fls_fetch import get_fls_json
+from .metrics import get_build_metrics
+from .rules import fls_format_error, nonexistent_fls_ids_error
+from .spec_lock_index import (
+    INDEX_DIR_NAME, SpecLockIndex, changed_section_keys, digest_tree, find_lock, parse_fls_paragraph_ids,
+    section_key, section_paragraphs,
+)
 import time 
-import requests
-import re
 import json
+from pathlib import Path
 from sphinx.errors import SphinxError
-from sphinx_needs.data import SphinxNeedsData
+from .validation import NeedCheck
 
-fls_paragraph_ids_url = "https://rust-lang.github.io/fls/paragraph-ids.json"
+# Base URL for constructing direct links
+fls_base_url = "https://rust-lang.github.io/fls/"
 
 class FLSValidationError(SphinxError):
     category = "FLS Validation Error"
 
-def check_fls(app, env):
-    """Main checking function for FLS validation"""
-    # First make sure all guidelines have correctly formatted FLS IDs
-    check_fls_exists_and_valid_format(app, env)
+class FlsCheck(NeedCheck):
+    """
+    Validation engine check for the FLS references of guidelines.
+
+    While the needs are traversed it validates the format of each guideline's ``fls``
+    field and keeps the fields the FLS checks need. The specification is only
+    fetched once every guideline has a well-formed FLS ID.
+    """
+    fields = ('fls', 'title')
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.guidelines = {}
+        self.format_error = None
+
+    def visit(self, need_id, values):
+        self.guidelines[need_id] = values
+        if self.format_error is None:
+            self.format_error = fls_format_error(need_id, values.get('fls'))
+
+    def finish(self, app, env):
+        # First make sure all guidelines have correctly formatted FLS IDs
+        if self.format_error is not None:
+            logger.error(self.format_error)
+            raise FLSValidationError(self.format_error)
+        check_fls(app, env, self.guidelines)
+
+
+def check_fls(app, env, guidelines):
+    """
+    Main checking function for FLS validation
+
+    Args:
+        app: The Sphinx application
+        env: The Sphinx environment
+        guidelines: Dictionary of guideline need IDs to their 'fls' and 'title' fields
+    """
     offline_mode = env.config.offline
+    fls_paragraph_ids_url = app.config.fls_paragraph_ids_url
     
     # Gather all FLS paragraph IDs from the specification and get the raw JSON
     fls_ids, raw_json_data = gather_fls_paragraph_ids(app, fls_paragraph_ids_url)
@@ -30,7 +72,7 @@ def check_fls(app, env):
         raise FLSValidationError(error_message) 
     if not offline_mode: # in offline mode, ignore checking against the lock file
         # Check for differences against lock file
-        has_differences, differences = check_fls_lock_consistency(app, env, raw_json_data)
+        has_differences, differences = check_fls_lock_consistency(app, guidelines, raw_json_data)
         if has_differences:
             error_message = "The FLS specification has changed since the lock file was created:\n"
             for diff in differences:
@@ -41,19 +83,20 @@ def check_fls(app, env):
             logger.error(error_message)
             raise FLSValidationError(error_message)
     # Check if all referenced FLS IDs exist
-    check_fls_ids_correct(app, env, fls_ids)
+    check_fls_ids_correct(app, guidelines, fls_ids)
     
     # Read the ignore list
     fls_id_ignore_list = read_fls_ignore_list(app)
     
     # Insert coverage information into fls_ids
-    insert_fls_coverage(app, env, fls_ids)
+    insert_fls_coverage(guidelines, fls_ids)
     
     # Calculate and report coverage
     coverage_data = calculate_fls_coverage(fls_ids, fls_id_ignore_list)
     
     # Log coverage report
     log_coverage_report(coverage_data)
+    record_coverage_metrics(app, coverage_data)
 
 
 def read_fls_ignore_list(app):
@@ -64,11 +107,7 @@ def read_fls_ignore_list(app):
     if ignore_file_path.exists():
         logger.info(f"Reading FLS ignore list from {ignore_file_path}")
         with open(ignore_file_path, 'r') as f:
-            for line in f:
-                # Remove comments and whitespace
-                line = line.split('#')[0].strip()
-                if line:
-                    ignore_list.append(line)
+            ignore_list = parse_fls_ignore_list(f)
         logger.info(f"Loaded {len(ignore_list)} FLS IDs to ignore")
     else:
         logger.warning(f"No FLS ignore list found at {ignore_file_path}")
@@ -76,94 +115,49 @@ def read_fls_ignore_list(app):
     return ignore_list
 
 
-def check_fls_exists_and_valid_format(app, env):
-    logger.debug("check_fls_exists_and_valid_format")
-
-    data = SphinxNeedsData(env)
-
-    needs = data.get_needs_view()
-    logger.debug(f"Checking needs {needs!r}")
-
-    # Regular expression for FLS ID validation
-    # Format: fls_<12 alphanumeric chars including upper and lowercase>
-    fls_pattern = re.compile(r'^fls_[a-zA-Z0-9]{9,12}$')
-
-    for need_id, need in needs.items():
-        logger.debug(f"ID: {need_id}, Need: {need}")
-        if need.get('type') == 'guideline':
-            fls_value = need.get("fls")
-            
-            # Check if fls field exists and is not empty
-            if fls_value is None:
-                msg = f"Need {need_id} has no fls field"
-                logger.error(msg)
-                raise FLSValidationError(msg)
-                
-            if fls_value == "":
-                msg = f"Need {need_id} has empty fls field"
-                logger.error(msg)
-                raise FLSValidationError(msg)
-            
-            # Validate FLS ID format
-            if not fls_pattern.match(fls_value):
-                msg = f"Need {need_id} has invalid fls format: '{fls_value}'. Expected format: fls_ followed by 12 alphanumeric characters"
-                logger.error(msg)
-                raise FLSValidationError(msg)
-
-    
-def check_fls_ids_correct(app, env, fls_ids):
+def check_fls_ids_correct(app, guidelines, fls_ids):
     """
     Check that all FLS IDs referenced in guidelines actually exist in the specification.
     
     Args:
         app: The Sphinx application
-        env: The Sphinx environment
+        guidelines: Dictionary of guideline need IDs to their 'fls' and 'title' fields
         fls_ids: Dictionary of FLS paragraph IDs mapped to their source URLs
     """
     logger.debug("check_fls_ids_correct")
-    data = SphinxNeedsData(env)
-    needs = data.get_needs_view()
     
     # Track any errors found
     invalid_ids = []
-    
-    # prefiltering: this is mainly done for tqdm progress
-    guidelines = {k: v for k, v in needs.items() if v.get('type') == 'guideline'}
-    
-    pbar = get_tqdm(iterable=guidelines.items(), desc="Validating FLS IDs",bar_format=bar_format, unit="need")
 
     # Check each guideline's FLS reference
-    for need_id, need in pbar:
-        if need.get('type') == 'guideline':
-            pbar.set_postfix(fls_id=need_id)
-            fls_value = need.get("fls")
+    for need_id, need in guidelines.items():
+        fls_value = need.get("fls")
+        
+        # Skip needs we already validated format for
+        if fls_value is None or fls_value == "":
+            continue
             
-            # Skip needs we already validated format for
-            if fls_value is None or fls_value == "":
-                continue
-                
-            # Check if the FLS ID exists in the gathered IDs
-            if fls_value not in fls_ids:
-                invalid_ids.append((need_id, fls_value))
-                logger.warning(f"Need {need_id} references non-existent FLS ID: '{fls_value}'")
+        # Check if the FLS ID exists in the gathered IDs
+        if fls_value not in fls_ids:
+            invalid_ids.append((need_id, fls_value))
+            logger.warning(f"Need {need_id} references non-existent FLS ID: '{fls_value}'")
         
         # Raise error if any invalid IDs were found
         if invalid_ids:
-            error_message = "The following needs reference non-existent FLS IDs:\n"
-            for need_id, fls_id in invalid_ids:
-                error_message += f"  - Need {need_id} references '{fls_id}'\n"
+            error_message = nonexistent_fls_ids_error(invalid_ids)
             logger.error(error_message)
             raise FLSValidationError(error_message)
         
     logger.info("All FLS references in guidelines are valid")
 
-    pbar.close()  # Ensure cleanup
 
 
 def gather_fls_paragraph_ids(app, json_url):
     """
     Gather all Ferrocene Language Specification paragraph IDs from the paragraph-ids.json file 
     or from the lock file in offline mode, including both container section IDs and individual paragraph IDs.
+
+    The result is computed once per process and shared by every hook that asks for it.
     
     Args:
         app: The Sphinx application
@@ -172,124 +166,86 @@ def gather_fls_paragraph_ids(app, json_url):
     Returns:
         Dictionary mapping paragraph IDs to metadata AND the complete raw JSON data
     """
+    # Cache of successful results, keyed by source
+    if not hasattr(app, 'fls_paragraph_ids'):
+        app.fls_paragraph_ids = {}
+
+    cache_key = (json_url, app.config.offline)
+    if cache_key in app.fls_paragraph_ids:
+        return app.fls_paragraph_ids[cache_key]
+
+    fls_ids, raw_json_data = read_fls_paragraph_ids(app, json_url)
+    if raw_json_data:
+        app.fls_paragraph_ids[cache_key] = (fls_ids, raw_json_data)
+    return fls_ids, raw_json_data
+
+
+def read_fls_paragraph_ids(app, json_url):
+    """
+    Read FLS paragraph IDs from the (cached) live specification, or from the lock file index
+    in offline mode. See gather_fls_paragraph_ids for the return value; in offline mode the
+    second element is the SpecLockIndex of the lock file.
+    """
     offline = app.config.offline
-    lock_path = app.confdir / 'spec.lock'
-    
-    # Dictionary to store all FLS IDs and their metadata
-    all_fls_ids = {}
-    raw_json_data = None
-    
-    try:
-        # Load the JSON file
-        if not offline:
-            logger.info("Gathering FLS paragraph IDs from %s", json_url)
-            response = requests.get(json_url)
-            response.raise_for_status()  # Raise exception for HTTP errors
-                # Parse the JSON data
-            try:
-                raw_json_data = response.json()
-                data = raw_json_data  # Keep reference to the original data
-                logger.debug("Successfully parsed JSON data")
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON: {e}")
-                logger.debug(f"Response content preview: {response.text[:500]}...")
-                raise
-
-        else : # if online mode is on read from the lock file
-
-            if not lock_path.exists(): 
-                logger.warning(f"No FLS lock file found at {lock_path}") # TODO: returns an error
-                return False, []
-            logger.info("Gathering FLS paragraph IDs from lock file: %s", lock_path)
-            with open(lock_path, 'r', encoding='utf-8') as f:
-                raw_json_data=f.read()
-                data = json.loads(raw_json_data)
+    lock_path = find_lock(app.confdir)
+    
+    # Load the JSON file
+    if not offline:
+        # Deferred: offline builds never touch the network
+        import requests
+
+        logger.info("Gathering FLS paragraph IDs from %s", json_url)
+        try:
+            raw_json_data = get_fls_json(app, json_url)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching paragraph IDs from {json_url}: {e}")
+            return {}, None
+        logger.debug("Successfully parsed JSON data")
 
-        
         # Check if we have the expected document structure
-        if 'documents' not in data:
+        if 'documents' not in raw_json_data:
             logger.error("JSON does not have 'documents' key")
-            logger.debug(f"JSON keys: {list(data.keys())}")
+            logger.debug(f"JSON keys: {list(raw_json_data.keys())}")
             return {}, None
-        
-        # Base URL for constructing direct links
-        base_url = "https://rust-lang.github.io/fls/"
-        
-        # Process each document in the JSON structure
-        for document in data['documents']:
-            doc_title = document.get('title', 'Unknown')
-            doc_link = document.get('link', '')
-            
-            # Process each section in the document
-            for section in document.get('sections', []):
-                section_title = section.get('title', 'Unknown')
-                section_id = section.get('id', '')
-                section_number = section.get('number', '')
-                section_link = section.get('link', '')
-                is_informational = section.get('informational', False)
-                
-                # Add the section container ID if it starts with 'fls_'
-                if section_id and section_id.startswith('fls_'):
-                    direct_url = f"{base_url}{section_link}"
-                    
-                    # Store section metadata
-                    all_fls_ids[section_id] = {
-                        "url": direct_url,
-                        "section_id": section_number,
-                        "document_title": doc_title,
-                        "section_title": section_title,
-                        "section_number": section_number,
-                        "is_container": True,  # Mark as a container/section
-                        "informational": is_informational
-                        # Note: No checksum for container IDs
-                    }
-                
-                # Process each paragraph in the section
-                for paragraph in section.get('paragraphs', []):
-                    para_id = paragraph.get('id', '')
-                    para_number = paragraph.get('number', '')
-                    para_link = paragraph.get('link', '')
-                    para_checksum = paragraph.get('checksum', '')
-                    
-                    # Skip entries without proper IDs
-                    if not para_id or not para_id.startswith('fls_'):
-                        continue
-                    
-                    # Create the full URL
-                    direct_url = f"{base_url}{para_link}"
-                    
-                    # Store metadata
-                    all_fls_ids[para_id] = {
-                        "url": direct_url,
-                        "section_id": para_number,
-                        "document_title": doc_title,
-                        "section_title": section_title,
-                        "section_number": section_number,
-                        "checksum": para_checksum,
-                        "is_container": False,  # Mark as individual paragraph
-                        "parent_section_id": section_id if section_id else None
-                    }
-        
-        logger.info(f"Found {len(all_fls_ids)} total FLS IDs (sections and paragraphs)")
-        # Count sections vs paragraphs
-        sections_count = sum(1 for metadata in all_fls_ids.values() if metadata.get('is_container', False))
-        paragraphs_count = len(all_fls_ids) - sections_count
-        logger.info(f"  - {sections_count} section/container IDs")
-        logger.info(f"  - {paragraphs_count} paragraph IDs")
-        
-        return all_fls_ids, raw_json_data
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching paragraph IDs from {json_url}: {e}")
-        return {}, None
 
-def check_fls_lock_consistency(app, env, fls_raw_data):
+        all_fls_ids = parse_fls_paragraph_ids(raw_json_data, fls_base_url)
+
+    else : # if online mode is on read from the lock file
+
+        if not lock_path.exists(): 
+            logger.warning(f"No FLS lock file found at {lock_path}") # TODO: returns an error
+            return False, []
+        logger.info("Gathering FLS paragraph IDs from lock file: %s", lock_path)
+        raw_json_data = get_spec_lock_index(app)
+        all_fls_ids = dict(raw_json_data.items(fls_base_url))
+    
+    logger.info(f"Found {len(all_fls_ids)} total FLS IDs (sections and paragraphs)")
+    # Count sections vs paragraphs
+    sections_count = sum(1 for metadata in all_fls_ids.values() if metadata.get('is_container', False))
+    paragraphs_count = len(all_fls_ids) - sections_count
+    logger.info(f"  - {sections_count} section/container IDs")
+    logger.info(f"  - {paragraphs_count} paragraph IDs")
+    metrics = get_build_metrics(app)
+    metrics.set("fls_ids_loaded", sections_count, kind="section")
+    metrics.set("fls_ids_loaded", paragraphs_count, kind="paragraph")
+    
+    return all_fls_ids, raw_json_data
+
+
+def get_spec_lock_index(app):
+    """Open the index of the lock file, in whichever form it is, once per process, regenerating it if stale"""
+    if not hasattr(app, 'spec_lock_index'):
+        app.spec_lock_index = SpecLockIndex.open(find_lock(app.confdir), Path(app.doctreedir) / INDEX_DIR_NAME)
+    return app.spec_lock_index
+
+
+def check_fls_lock_consistency(app, guidelines, fls_raw_data):
     """
     Compare live FLS JSON data with the lock file to detect changes
 
     Args:
         app: The Sphinx application
-        env: The Sphinx environment
+        guidelines: Dictionary of guideline need IDs to their 'fls' and 'title' fields
         fls_raw_data: Raw JSON data from the live specification
 
     Returns:
@@ -307,30 +263,7 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
     from pathlib import Path
 
     logger.info("Checking FLS lock file consistency")
-    lock_path = app.confdir / 'spec.lock'
-
-    # Get the needs data to find affected guidelines
-    data = SphinxNeedsData(env)
-    needs = data.get_needs_view()
-
-    # Map of FLS IDs to guidelines that reference them
-    fls_to_guidelines = {}
-
-    # prefiltering: this is mainly done for tqdm progress
-    guidelines = {k: v for k, v in needs.items() if v.get('type') == 'guideline'}
-    pbar = get_tqdm(iterable=guidelines.items(), desc="Checking fls lock consistency", bar_format=bar_format, unit="need")
-
-    for need_id, need in pbar:
-        if need.get('type') == 'guideline':
-            pbar.set_postfix(fls_id=need_id)
-            fls_value = need.get("fls")
-            if fls_value:
-                if fls_value not in fls_to_guidelines:
-                    fls_to_guidelines[fls_value] = []
-                fls_to_guidelines[fls_value].append({
-                    'id': need_id,
-                    'title': need.get('title', 'Untitled')
-                })
+    lock_path = find_lock(app.confdir)
 
     # If no lock file exists, skip checking
     if not lock_path.exists():
@@ -343,47 +276,61 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
     detailed_differences = []  # This will go to the temp file
 
     try:
-        # Load lock file
-        with open(lock_path, 'r', encoding='utf-8') as f:
-            locked_data = json.load(f)
+        # Open the lock file index; it stores the hash tree of the locked paragraphs
+        locked_index = get_spec_lock_index(app)
 
-        # Create maps of paragraph IDs to checksums for both live and locked data
+        # Compare the hash trees of the live data and the lock file from the root down.
+        # Only the sections whose digests differ need to be diffed paragraph by paragraph.
+        changed_sections = changed_section_keys(digest_tree(fls_raw_data), locked_index.digest_tree())
+        if not changed_sections:
+            logger.info("Live FLS data matches the lock file")
+            return False, []
+
+        # Map of FLS IDs to guidelines that reference them
+        fls_to_guidelines = {}
+
+        for need_id, need in guidelines.items():
+            fls_value = need.get("fls")
+            if fls_value:
+                if fls_value not in fls_to_guidelines:
+                    fls_to_guidelines[fls_value] = []
+                fls_to_guidelines[fls_value].append({
+                    'id': need_id,
+                    'title': need.get('title', 'Untitled')
+                })
+
+        # Create a map of paragraph IDs to checksums for the changed live sections
         live_checksums = {}
-        locked_checksums = {}
 
         # Extract from live data
         for document in fls_raw_data.get('documents', []):
             for section in document.get('sections', []):
-                for paragraph in section.get('paragraphs', []):
-                    para_id = paragraph.get('id', '')
-                    para_checksum = paragraph.get('checksum', '')
-                    para_number = paragraph.get('number', '')
-
-                    if para_id and para_id.startswith('fls_'):
-                        live_checksums[para_id] = {
-                            'checksum': para_checksum,
-                            'section_id': para_number
-                        }
-
-        # Extract from locked data
-        for document in locked_data.get('documents', []):
-            for section in document.get('sections', []):
-                for paragraph in section.get('paragraphs', []):
-                    para_id = paragraph.get('id', '')
-                    para_checksum = paragraph.get('checksum', '')
-                    para_number = paragraph.get('number', '')
-
-                    if para_id and para_id.startswith('fls_'):
-                        locked_checksums[para_id] = {
-                            'checksum': para_checksum,
-                            'section_id': para_number
-                        }
+                if section_key(section) not in changed_sections:
+                    continue
+                for para_id, para_checksum, para_number in section_paragraphs(section):
+                    live_checksums[para_id] = {
+                        'checksum': para_checksum,
+                        'section_id': para_number
+                    }
 
-        logger.info(f"Found {len(live_checksums)} paragraphs in live data")
-        logger.info(f"Found {len(locked_checksums)} paragraphs in lock file")
+        # Walk the locked paragraphs of the changed sections, sorted by ID, comparing them with the live data
+        locked_ids = set()
+        removed_ids = []
+        changed_ids = []
+        for fls_id, locked_checksum, locked_section in sorted(locked_index.changed_paragraphs(changed_sections)):
+            locked_ids.add(fls_id)
+            live = live_checksums.get(fls_id)
+            if live is None:
+                removed_ids.append((fls_id, locked_section))
+            elif live['checksum'] != locked_checksum or live['section_id'] != locked_section:
+                changed_ids.append((fls_id, locked_checksum, locked_section))
+
+        logger.info(f"Found {len(changed_sections)} changed FLS sections")
+        logger.info(f"Found {len(live_checksums)} paragraphs in changed sections of live data")
+        logger.info(f"Found {len(locked_ids)} paragraphs in changed sections of lock file")
 
         # Helper function to track affected guidelines
-        def track_affected_guidelines(fls_id, change_type):
+        def track_affected_guidelines(fls_id, change_type, section_id):
             for guideline in fls_to_guidelines.get(fls_id, []):
                 guideline_id = guideline['id']
                 if guideline_id not in affected_guidelines:
@@ -391,7 +338,6 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
                         'title': guideline['title'],
                         'changes': []
                     }
-                section_id = live_checksums.get(fls_id, {}).get('section_id') or locked_checksums.get(fls_id, {}).get('section_id')
                 affected_guidelines[guideline_id]['changes'].append({
                     'fls_id': fls_id,
                     'change_type': change_type,
@@ -410,45 +356,40 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
             return "\n".join(result)
 
         # Look for new IDs
-        new_ids = set(live_checksums.keys()) - set(locked_checksums.keys())
+        new_ids = set(live_checksums.keys()) - locked_ids
         if new_ids:
             for fls_id in sorted(new_ids):
                 diff_msg = f"New FLS ID added: {fls_id} ({live_checksums[fls_id]['section_id']})"
                 affected_msg = format_affected_guidelines(fls_id)
                 detailed_differences.append(f"{diff_msg}\n  Affected guidelines:\n{affected_msg}")
-                track_affected_guidelines(fls_id, "added")
+                track_affected_guidelines(fls_id, "added", live_checksums[fls_id]['section_id'])
             has_differences = True
 
         # Look for removed IDs
-        removed_ids = set(locked_checksums.keys()) - set(live_checksums.keys())
         if removed_ids:
-            for fls_id in sorted(removed_ids):
-                diff_msg = f"FLS ID removed: {fls_id} ({locked_checksums[fls_id]['section_id']})"
+            for fls_id, locked_section in removed_ids:
+                diff_msg = f"FLS ID removed: {fls_id} ({locked_section})"
                 affected_msg = format_affected_guidelines(fls_id)
                 detailed_differences.append(f"{diff_msg}\n  Affected guidelines:\n{affected_msg}")
-                track_affected_guidelines(fls_id, "removed")
+                track_affected_guidelines(fls_id, "removed", locked_section)
             has_differences = True
 
         # Check for checksum changes on existing IDs
-        common_ids = set(live_checksums.keys()) & set(locked_checksums.keys())
-        for fls_id in sorted(common_ids):
+        for fls_id, locked_checksum, locked_section in changed_ids:
             live_checksum = live_checksums[fls_id]['checksum']
-            locked_checksum = locked_checksums[fls_id]['checksum']
+            live_section = live_checksums[fls_id]['section_id']
 
             changes = []
             change_type = None
 
             if live_checksum != locked_checksum:
                 changes.append(
-                    f"Content changed for FLS ID {fls_id} ({live_checksums[fls_id]['section_id']}): " +
+                    f"Content changed for FLS ID {fls_id} ({live_section}): " +
                     f"checksum was {locked_checksum[:8]}... now {live_checksum[:8]}..."
                 )
                 change_type = "content_changed"
 
             # Also check if section IDs have changed
-            live_section = live_checksums[fls_id]['section_id']
-            locked_section = locked_checksums[fls_id]['section_id']
-
             if live_section != locked_section:
                 changes.append(
                     f"Section changed for FLS ID {fls_id}: {locked_section} -> {live_section}"
@@ -465,7 +406,7 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
                     detailed_differences.append(changes[i])
 
                 if change_type:
-                    track_affected_guidelines(fls_id, change_type)
+                    track_affected_guidelines(fls_id, change_type, live_section or locked_section)
 
                 has_differences = True
 
@@ -499,163 +440,10 @@ def check_fls_lock_consistency(app, env, fls_raw_data):
 
         return has_differences, summary
 
-    except (json.JSONDecodeError, IOError) as e:
+    except (ValueError, IOError) as e:
         logger.error(f"Error reading or parsing lock file {lock_path}: {e}")
         return False, [f"Failed to read lock file: {e}"]
 
-def insert_fls_coverage(app, env, fls_ids):
-    """
-    Enrich the fls_ids with whether each FLS ID is covered by coding guidelines
-    
-    Args:
-        app: The Sphinx application
-        env: The Sphinx environment
-        fls_ids: Dictionary of FLS paragraph IDs with metadata
-    """
-    logger.debug("Inserting FLS coverage data")
-    data = SphinxNeedsData(env)
-    needs = data.get_needs_view()
-    
-    # Initialize coverage for all FLS IDs
-    for fls_id in fls_ids:
-        fls_ids[fls_id]['covered'] = False
-        fls_ids[fls_id]['covering_needs'] = []  # List to store all covering guidelines
-        
-        # Extract chapter information from section_id (e.g., "22.1:4" -> chapter 22)
-        section_id = fls_ids[fls_id]['section_id']
-        logger.debug(f"Processing section_id: {section_id} for {fls_id}")
-        
-        # Handle formats like "22.1:4", "4.3.1:9", or "A.1:2"
-        if ':' in section_id:
-            # Split at colon to get the section number without paragraph number
-            section_parts = section_id.split(':')[0].split('.')
-        else:
-            # Fallback if no colon present
-            section_parts = section_id.split('.')
-            
-        if section_parts and section_parts[0].isdigit():
-            chapter = int(section_parts[0])
-            fls_ids[fls_id]['chapter'] = chapter
-        else:
-            # Handle appendices or other non-standard formats
-            first_char = section_id[0] if section_id else None
-            if first_char and first_char.isalpha():
-                # For appendices like "A.1.1", use the letter as chapter
-                fls_ids[fls_id]['chapter'] = first_char
-            else:
-                fls_ids[fls_id]['chapter'] = 'unknown'
-    
-    # Mark covered FLS IDs
-    unique_covered_ids = set()
-    total_references = 0
-    
-    for need_id, need in needs.items():
-        if need.get('type') == 'guideline':
-            fls_value = need.get("fls")
-            if fls_value and fls_value in fls_ids:
-                fls_ids[fls_value]['covered'] = True
-                fls_ids[fls_value]['covering_needs'].append(need_id)
-                unique_covered_ids.add(fls_value)
-                total_references += 1
-    
-    logger.info(f"Found {total_references} references to FLS IDs in guidelines")
-    logger.info(f"Found {len(unique_covered_ids)} unique FLS IDs covered by guidelines")
-    return fls_ids
-
-
-def calculate_fls_coverage(fls_ids, fls_id_ignore_list):
-    """
-    Calculate coverage statistics for FLS IDs
-    
-    Args:
-        fls_ids: Dictionary of FLS paragraph IDs with metadata, including coverage status
-        fls_id_ignore_list: List of FLS IDs to ignore in coverage calculations
-    
-    Returns:
-        Dictionary containing coverage statistics
-    """
-    logger.debug("Calculating FLS coverage statistics")
-    
-    # Track statistics
-    total_ids = 0
-    covered_ids = 0
-    ignored_ids = 0
-    
-    # Organize by chapter
-    chapters = {}
-    
-    # Process each FLS ID
-    for fls_id, metadata in fls_ids.items():
-        chapter = metadata.get('chapter', 'unknown')
-        
-        # Initialize chapter data if needed
-        if chapter not in chapters:
-            chapters[chapter] = {
-                'total': 0,
-                'covered': 0,
-                'ignored': 0,
-                'ids': []
-            }
-        
-        # Add to chapter's ID list
-        chapters[chapter]['ids'].append(fls_id)
-        chapters[chapter]['total'] += 1
-        total_ids += 1
-        
-        # Check if ID should be ignored
-        if fls_id in fls_id_ignore_list:
-            ignored_ids += 1
-            chapters[chapter]['ignored'] += 1
-            # Mark as ignored in the original data structure too
-            fls_ids[fls_id]['ignored'] = True
-        else:
-            fls_ids[fls_id]['ignored'] = False
-            
-            # Count coverage if not ignored
-            if metadata.get('covered', False):
-                covered_ids += 1
-                chapters[chapter]['covered'] += 1
-    
-    # Calculate coverage percentages
-    effective_total = total_ids - ignored_ids
-    overall_coverage = (covered_ids / effective_total * 100) if effective_total > 0 else 0
-    
-    # Calculate chapter coverage
-    chapter_coverage = {}
-    for chapter, data in chapters.items():
-        effective_chapter_total = data['total'] - data['ignored']
-        
-        if effective_chapter_total == 0:
-            # All IDs in this chapter are ignored
-            chapter_coverage[chapter] = "IGNORED"
-        else:
-            chapter_coverage[chapter] = (data['covered'] / effective_chapter_total * 100)
-    
-    # Sort chapters by custom logic to handle mixed types
-    def chapter_sort_key(chapter):
-        if isinstance(chapter, int):
-            return (0, chapter)  # Sort integers first, by their value
-        elif isinstance(chapter, str) and chapter.isalpha():
-            return (1, chapter)  # Sort letters second, alphabetically
-        else:
-            return (2, str(chapter))  # Sort anything else last
-    
-    sorted_chapters = sorted(chapters.keys(), key=chapter_sort_key)
-    
-    # Prepare result
-    coverage_data = {
-        'total_ids': total_ids,
-        'covered_ids': covered_ids,
-        'ignored_ids': ignored_ids,
-        'effective_total': effective_total,
-        'overall_coverage': overall_coverage,
-        'chapters': sorted_chapters,
-        'chapter_data': chapters,
-        'chapter_coverage': chapter_coverage
-    }
-    
-    return coverage_data
-
 def log_coverage_report(coverage_data):
     """Log a report of FLS coverage statistics"""
     logger.info("=== FLS Coverage Report ===")
@@ -673,3 +461,15 @@ def log_coverage_report(coverage_data):
             logger.info(f"  Chapter {chapter}: {coverage:.2f}%")
 
 
+def record_coverage_metrics(app, coverage_data):
+    """Record the FLS coverage statistics in the build metrics"""
+    metrics = get_build_metrics(app)
+    metrics.set("fls_ids", coverage_data['total_ids'], state="total")
+    metrics.set("fls_ids", coverage_data['covered_ids'], state="covered")
+    metrics.set("fls_ids", coverage_data['ignored_ids'], state="ignored")
+    metrics.set("fls_coverage_percent", round(coverage_data['overall_coverage'], 4), chapter="all")
+    for chapter in coverage_data['chapters']:
+        coverage = coverage_data['chapter_coverage'][chapter]
+        # Chapters whose IDs are all ignored have no coverage
+        if coverage != "IGNORED":
+            metrics.set("fls_coverage_percent", round(coverage, 4), chapter=chapter)
@@ -0,0 +1,137 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+FLS coverage of the guidelines.
+
+Only depends on the standard library, so that scripts like ``coverage_delta.py``
+can load it by path and compute coverage exactly like the build, without Sphinx.
+"""
+
+import logging
+
+# The Sphinx logger, like common.logger, which cannot be imported when loaded by path
+logger = logging.getLogger('sphinx')
+
+
+def parse_fls_ignore_list(lines):
+    """Return the FLS IDs listed in the lines of an ignore list, without comments"""
+    ignore_list = []
+    for line in lines:
+        # Remove comments and whitespace
+        line = line.split('#')[0].strip()
+        if line:
+            ignore_list.append(line)
+    return ignore_list
+
+
+def insert_fls_coverage(guidelines, fls_ids):
+    """
+    Enrich the fls_ids with whether each FLS ID is covered by coding guidelines
+
+    Args:
+        guidelines: Dictionary of guideline need IDs to their 'fls' field
+        fls_ids: Dictionary of FLS paragraph IDs with metadata
+    """
+    logger.debug("Inserting FLS coverage data")
+
+    # Initialize coverage for all FLS IDs; their chapter was derived when they were loaded
+    for metadata in fls_ids.values():
+        metadata['covered'] = False
+        metadata['covering_needs'] = []  # List to store all covering guidelines
+
+    # Mark covered FLS IDs
+    unique_covered_ids = set()
+    total_references = 0
+
+    for need_id, need in guidelines.items():
+        fls_value = need.get("fls")
+        if fls_value and fls_value in fls_ids:
+            fls_ids[fls_value]['covered'] = True
+            fls_ids[fls_value]['covering_needs'].append(need_id)
+            unique_covered_ids.add(fls_value)
+            total_references += 1
+
+    logger.info(f"Found {total_references} references to FLS IDs in guidelines")
+    logger.info(f"Found {len(unique_covered_ids)} unique FLS IDs covered by guidelines")
+    return fls_ids
+
+
+def calculate_fls_coverage(fls_ids, fls_id_ignore_list):
+    """
+    Calculate coverage statistics for FLS IDs
+
+    Args:
+        fls_ids: Dictionary of FLS paragraph IDs with metadata, including coverage status
+        fls_id_ignore_list: List of FLS IDs to ignore in coverage calculations
+
+    Returns:
+        Dictionary containing coverage statistics
+    """
+    logger.debug("Calculating FLS coverage statistics")
+
+    ignored = set(fls_id_ignore_list)
+    covered = {fls_id for fls_id, metadata in fls_ids.items() if metadata.get('covered', False)}
+
+    # Group the IDs by the chapter derived when they were loaded
+    chapter_ids = {}
+    for fls_id, metadata in fls_ids.items():
+        chapter_ids.setdefault(metadata.get('chapter', 'unknown'), []).append(fls_id)
+        # Mark as ignored in the original data structure too
+        metadata['ignored'] = fls_id in ignored
+
+    # Aggregate per chapter with set intersections
+    chapters = {}
+    for chapter, ids in chapter_ids.items():
+        id_set = set(ids)
+        chapters[chapter] = {
+            'total': len(ids),
+            # Ignored IDs do not count as covered
+            'covered': len((id_set & covered) - ignored),
+            'ignored': len(id_set & ignored),
+            'ids': ids
+        }
+
+    total_ids = len(fls_ids)
+    covered_ids = sum(data['covered'] for data in chapters.values())
+    ignored_ids = sum(data['ignored'] for data in chapters.values())
+
+    # Calculate coverage percentages
+    effective_total = total_ids - ignored_ids
+    overall_coverage = (covered_ids / effective_total * 100) if effective_total > 0 else 0
+
+    # Calculate chapter coverage
+    chapter_coverage = {}
+    for chapter, data in chapters.items():
+        effective_chapter_total = data['total'] - data['ignored']
+
+        if effective_chapter_total == 0:
+            # All IDs in this chapter are ignored
+            chapter_coverage[chapter] = "IGNORED"
+        else:
+            chapter_coverage[chapter] = (data['covered'] / effective_chapter_total * 100)
+
+    # Sort chapters by custom logic to handle mixed types
+    def chapter_sort_key(chapter):
+        if isinstance(chapter, int):
+            return (0, chapter)  # Sort integers first, by their value
+        elif isinstance(chapter, str) and chapter.isalpha():
+            return (1, chapter)  # Sort letters second, alphabetically
+        else:
+            return (2, str(chapter))  # Sort anything else last
+
+    sorted_chapters = sorted(chapters.keys(), key=chapter_sort_key)
+
+    # Prepare result
+    coverage_data = {
+        'total_ids': total_ids,
+        'covered_ids': covered_ids,
+        'ignored_ids': ignored_ids,
+        'effective_total': effective_total,
+        'overall_coverage': overall_coverage,
+        'chapters': sorted_chapters,
+        'chapter_data': chapters,
+        'chapter_coverage': chapter_coverage
+    }
+
+    return coverage_data
@@ -0,0 +1,268 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Persistent HTTP cache for the FLS paragraph-ids.json document.
+
+The response body is stored under the doctree directory together with the
+ETag/Last-Modified validators the server sent. Later builds send those
+validators back and reuse the stored body when the server answers with
+304 Not Modified.
+
+The request is started in a helper process when the builder is initialised,
+so that it overlaps with reading the sources, and its result is collected
+when the FLS checks need the document.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from .common import logger
+from .metrics import get_build_metrics
+
+# Directory, relative to the doctree directory, holding the cached responses
+CACHE_DIR_NAME = "fls_cache"
+
+# Seconds to wait for the FLS site before falling back to the cached copy
+REQUEST_TIMEOUT = 30
+
+
+def cache_paths(app, url):
+    """Return the (body, metadata) cache file paths for the given URL"""
+    cache_dir = Path(app.doctreedir) / CACHE_DIR_NAME
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.meta.json"
+
+
+def read_cache(app, url):
+    """
+    Read the cached response for the URL.
+
+    Returns:
+        Tuple of (body bytes, metadata dict), or (None, {}) if nothing usable is cached
+    """
+    body_path, meta_path = cache_paths(app, url)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("url") != url:
+            return None, {}
+        with open(body_path, "rb") as f:
+            return f.read(), meta
+    except (OSError, json.JSONDecodeError):
+        return None, {}
+
+
+def write_cache(app, url, body, response):
+    """Store a response body and its validators, replacing any previous copy atomically"""
+    body_path, meta_path = cache_paths(app, url)
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    try:
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode("utf-8"))):
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write FLS cache to {body_path.parent}: {e}")
+
+
+def delete_cache(app, url):
+    """Remove the cached response for the URL, if any"""
+    for path in cache_paths(app, url):
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove FLS cache file {path}: {e}")
+
+
+def fetch_fls_json(app, url):
+    """
+    Fetch and parse a JSON document from the FLS site, revalidating the on-disk cache.
+
+    Args:
+        app: The Sphinx application
+        url: The URL of the JSON document
+
+    Returns:
+        The parsed JSON data
+
+    Raises:
+        requests.exceptions.RequestException: if the request fails and nothing is cached
+        json.JSONDecodeError: if the document is not valid JSON
+    """
+    return fetch_fls_document(app, url)[1]
+
+
+def fetch_fls_document(app, url):
+    """
+    Fetch a JSON document from the FLS site as fetch_fls_json does.
+
+    Args:
+        app: The Sphinx application
+        url: The URL of the JSON document
+
+    Returns:
+        Tuple of (the document as bytes, the parsed JSON data)
+
+    Raises:
+        requests.exceptions.RequestException: if the request fails and nothing is cached
+        json.JSONDecodeError: if the document is not valid JSON
+    """
+    # Deferred: requests is slow to import and only needed when the specification is fetched
+    import requests
+
+    cached_body, meta = read_cache(app, url)
+
+    headers = {}
+    if cached_body is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    # The response to cache, once its body has been parsed
+    fetched = None
+    try:
+        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached_body is not None:
+            logger.info("FLS data at %s not modified, using cached copy", url)
+            body = cached_body
+        else:
+            response.raise_for_status()  # Raise exception for HTTP errors
+            body = fetched = response.content
+    except requests.exceptions.RequestException as e:
+        if cached_body is None:
+            raise
+        logger.warning(f"Error fetching {url}: {e}; using cached copy")
+        body = cached_body
+
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON: {e}")
+        logger.debug(f"Response content preview: {body[:500]!r}...")
+        if fetched is None:
+            # A corrupt cached copy would be revalidated and reused by every later build
+            delete_cache(app, url)
+        raise
+
+    # Only cache a body that parses, with the validators that would keep it in use
+    if fetched is not None:
+        write_cache(app, url, fetched, response)
+    return body, data
+
+
+class Prefetch:
+    """
+    A fetch_fls_document call running in a helper process.
+
+    The helper is a new interpreter rather than a thread or a forked process: Sphinx
+    forks its workers for -j while the fetch runs, and a forked worker would inherit
+    the locks a thread holds mid-request (the import lock, socket or SSL locks) with
+    nothing left to release them. A subprocess shares no memory, and is started from
+    builder-inited, before any worker exists and while the build has a single thread.
+
+    The helper writes the document to stdout and the warnings it logged to stderr,
+    one JSON string per line, and updates the cache itself.
+    """
+
+    def __init__(self, app, url):
+        self.url = url
+        env = dict(os.environ)
+        extension_dir = str(Path(__file__).resolve().parent.parent)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [extension_dir, env.get("PYTHONPATH")]))
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-c", "from coding_guidelines.fls_fetch import prefetch_main; prefetch_main()",
+                str(app.doctreedir), url,
+            ],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+        )
+
+    def result(self, app):
+        """
+        Wait for the helper, returning the parsed document. If the helper failed, the
+        document is fetched again in this process, to raise and log exactly as
+        fetch_fls_json does.
+        """
+        body, warnings = self._process.communicate()
+        if self._process.returncode != 0:
+            logger.debug(f"FLS prefetch failed: {warnings.decode('utf-8', 'replace').strip()}")
+            return fetch_fls_json(app, self.url)
+        for line in warnings.decode("utf-8").splitlines():
+            logger.warning(json.loads(line))
+        return json.loads(body)
+
+    def discard(self):
+        """Stop the helper if it is still running; the cache is only ever replaced atomically"""
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.communicate()
+
+
+def prefetch_main():
+    """Entry point of the prefetch helper process, see Prefetch"""
+    doctreedir, url = sys.argv[1:]
+
+    # Warnings are passed to the build, which logs them; nothing else is printed
+    class WarningHandler(logging.Handler):
+        def emit(self, record):
+            sys.stderr.write(json.dumps(record.getMessage()) + "\n")
+
+    logger.handlers[:] = [WarningHandler(logging.WARNING)]
+    logger.propagate = False
+    try:
+        # The fetch only uses the doctree directory of the application
+        body, _ = fetch_fls_document(SimpleNamespace(doctreedir=doctreedir), url)
+    except Exception:
+        sys.exit(1)
+    sys.stdout.buffer.write(body)
+
+
+def prefetch_fls_json(app):
+    """Hook for builder-inited: start fetching the FLS paragraph IDs while the sources are read"""
+    if app.config.offline:
+        return
+    app.fls_prefetch = Prefetch(app, app.config.fls_paragraph_ids_url)
+
+
+def discard_fls_prefetch(app, exception):
+    """
+    Hook for build-finished: stop a prefetch nothing waited for, e.g. when no document
+    changed and the FLS checks did not run.
+    """
+    prefetch = getattr(app, 'fls_prefetch', None)
+    if prefetch is not None:
+        app.fls_prefetch = None
+        prefetch.discard()
+
+
+def get_fls_json(app, url):
+    """
+    Return the JSON document at the URL, as fetch_fls_json does, waiting for the
+    background fetch if one was started for it.
+    """
+    prefetch = getattr(app, 'fls_prefetch', None)
+    if prefetch is None or prefetch.url != url:
+        return fetch_fls_json(app, url)
+
+    # Used once: a later call, e.g. after a failure, fetches again
+    app.fls_prefetch = None
+    start = time.perf_counter()
+    try:
+        return prefetch.result(app)
+    finally:
+        get_build_metrics(app).set("fls_fetch_wait_seconds", round(time.perf_counter() - start, 6))
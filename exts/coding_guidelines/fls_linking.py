@@ -1,23 +1,20 @@
-import re
 import os
-import sphinx
+import re
+import time
+from docutils import nodes
 from .common import logger
+from .metrics import get_build_metrics
 
+# FLS IDs as rendered by sphinx-needs in the "fls" field of a need
+fls_id_pattern = re.compile(r'^fls_[a-zA-Z0-9]{9,12}$')
 
-def build_finished(app, exception):
-    """Hook to run at the end of the build process."""
-    # The build finished hook also runs when an exception is raised.
-    if exception is not None:
-        return
-    
-    logger.info("Adding FLS links...")
-    
-    try:
-        with sphinx.util.display.progress_message("dumping paragraph ids"):
-            post_process_html(app)
-    except Exception as e:
-        logger.error(str(e))
-        raise
+# Directory with the stylesheet for FLS links
+static_dir = os.path.join(os.path.dirname(__file__), 'static')
+
+
+def add_static_path(app, config):
+    """Make the stylesheet for FLS links available to the HTML builder."""
+    config.html_static_path.append(static_dir)
 
 
 def load_fls_ids(app):
@@ -30,77 +27,85 @@ def load_fls_ids(app):
         logger.error(f"Failed to load FLS IDs: {e}")
         return {}
 
-def post_process_html(app):
-    
+
+def get_link_stats(app):
+    """Statistics about the FLS links added during the current build."""
+    if not hasattr(app, 'fls_link_stats'):
+        app.fls_link_stats = {
+            'scanned': 0,   # documents resolved and written in this build
+            'modified': 0,  # documents containing at least one FLS ID
+            'linked': 0,    # FLS IDs turned into links
+            'unknown': 0,   # FLS IDs not found in the specification
+            'seconds': 0.0,
+        }
+    return app.fls_link_stats
+
+
+def add_fls_links(app, doctree, docname):
+    """
+    Hook run once sphinx-needs has rendered the needs of a document: turn the FLS ID
+    shown in the "fls" field of each need into a link to the specification.
+
+    Sphinx only resolves the documents it writes, so unchanged pages of an incremental
+    build are never visited.
+    """
+    stats = get_link_stats(app)
+    start = time.perf_counter()
+    try:
+        link_fls_ids(app, doctree, docname, stats)
+    finally:
+        stats['scanned'] += 1
+        stats['seconds'] += time.perf_counter() - start
+
+
+def link_fls_ids(app, doctree, docname, stats):
+    data_nodes = [
+        data_node
+        for container in doctree.findall(nodes.inline)
+        if 'needs_fls' in container['classes']
+        for data_node in container.children
+        if isinstance(data_node, nodes.inline) and 'needs_data' in data_node['classes']
+    ]
+    if not data_nodes:
+        return
+    stats['modified'] += 1
+
     # Load FLS IDs if not already loaded
     if not hasattr(app, 'fls_urls'):
         app.fls_urls = load_fls_ids(app)
-    
-    # Pattern to match the proper HTML structure
-    pattern = r'<span class="needs_fls"><span class="needs_label">fls: </span><span class="needs_data">(fls_[a-zA-Z0-9]{9,12})</span></span>'
-    
-    # Function to replace FLS IDs with links
-    def replace_fls(match):
-        """Replace FLS ID with a link if it exists."""
-        fls_id = match.group(1)
-        
+
+    for data_node in data_nodes:
+        fls_id = data_node.astext()
+        if not fls_id_pattern.match(fls_id):
+            continue
+
         if fls_id in app.fls_urls:
-            return f'<span class="needs_fls"><span class="needs_label">fls: </span><span class="needs_data"><a href="{app.fls_urls[fls_id]}" class="fls-id">{fls_id}</a></span></span>'
+            link = nodes.reference(fls_id, fls_id, refuri=app.fls_urls[fls_id], classes=['fls-id'])
+            stats['linked'] += 1
         else:
-            return f'<span class="needs_fls"><span class="needs_label">fls: </span><span class="needs_data"><span class="fls-id unknown-fls">{fls_id}</span></span></span>'
-    
-    # CSS for styling
-    css = """
-/* Styling for FLS ID links */
-.fls-id {
-    font-family: monospace;
-    background-color: rgba(0, 0, 0, 0.05);
-    padding: 0.2em 0.4em;
-    border-radius: 3px;
-    text-decoration: none;
-    border-bottom: 1px dotted #666;
-}
-a.fls-id:hover {
-    background-color: rgba(0, 120, 215, 0.1);
-    color: #0078d7;
-    border-bottom-color: #0078d7;
-}
-.unknown-fls {
-    border-bottom: 1px dashed #cc0000;
-    color: #cc0000;
-}
-"""
-    
-    # Write CSS file
-    css_path = os.path.join(app.outdir, '_static', 'fls_links.css')
-    os.makedirs(os.path.dirname(css_path), exist_ok=True)
-    with open(css_path, 'w') as f:
-        f.write(css)
-    
-    # Process all HTML files
-    for root, _, files in os.walk(app.outdir):
-        for filename in files:
-            if filename.endswith('.html'):
-                filepath = os.path.join(root, filename)
-                
-                # Read HTML content
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Replace FLS IDs with links
-                modified = re.sub(pattern, replace_fls, content)
-                
-                # Add CSS link if needed
-                if modified != content and '<link rel="stylesheet" href="_static/fls_links.css"' not in modified:
-                    # Fix path to CSS file based on file location relative to outdir
-                    rel_path = os.path.relpath(app.outdir, os.path.dirname(filepath))
-                    css_path = os.path.join(rel_path, '_static', 'fls_links.css').replace('\\', '/')
-                    
-                    modified = modified.replace('</head>', 
-                                             f'<link rel="stylesheet" href="{css_path}" type="text/css" />\n</head>')
-                
-                # Write modified content back
-                if modified != content:
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        f.write(modified)
-                    logger.debug(f"Updated FLS links in {filepath}")
+            link = nodes.inline(fls_id, fls_id, classes=['fls-id', 'unknown-fls'])
+            stats['unknown'] += 1
+
+        data_node.children = []
+        data_node += link
+        logger.debug(f"Linked {fls_id} in {docname}")
+
+
+def build_finished(app, exception):
+    """Hook to run at the end of the build process: report the FLS links added in this build."""
+    stats = get_link_stats(app)
+    skipped = max(len(app.env.all_docs) - stats['scanned'], 0)
+
+    metrics = get_build_metrics(app)
+    metrics.inc("fls_link_documents", stats['scanned'], state="scanned")
+    metrics.inc("fls_link_documents", stats['modified'], state="modified")
+    metrics.inc("fls_link_documents", skipped, state="skipped")
+    metrics.inc("fls_links", stats['linked'], state="linked")
+    metrics.inc("fls_links", stats['unknown'], state="unknown")
+
+    if exception is not None:
+        return
+    logger.info(
+        f"FLS links: scanned {stats['scanned']} documents ({stats['modified']} modified, {skipped} skipped), "
+        f"linked {stats['linked']} FLS IDs ({stats['unknown']} unknown) in {stats['seconds']:.3f} seconds"
+    )
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Structured metrics of a build.
+
+Hooks record counters, gauges and timers with ``get_build_metrics(app)``.
+When the ``metrics`` config value is set, they are written next to the build
+output at the end of the build, as JSON (``<outdir>/../metrics.json``) and in
+the OpenMetrics text format (``<outdir>/../metrics.txt``), for CI to collect
+instead of scraping progress bars and log lines.
+
+Only the main process records metrics; hooks run by parallel read workers
+are not counted.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from .common import logger
+
+# File names of the exports, written to the parent of the output directory
+JSON_NAME = "metrics.json"
+OPENMETRICS_NAME = "metrics.txt"
+
+# Prefix of the metric names in the OpenMetrics export
+PREFIX = "coding_guidelines_"
+
+# Every metric that can be recorded, as name -> (type, help text)
+METRICS = {
+    "build_duration_seconds": ("gauge", "Wall time from configuration to the end of the build"),
+    "build_succeeded": ("gauge", "1 if the build succeeded, 0 if it failed"),
+    "hook_duration_seconds": ("timer", "Time spent in the extension's hooks"),
+    "needs_checked": ("counter", "Needs visited by the validation engine"),
+    "need_checksums": ("counter", "Need checksums computed or reused from previous builds"),
+    "fls_fetch_wait_seconds": ("gauge", "Time the FLS checks waited for the background fetch of the specification"),
+    "fls_ids_loaded": ("gauge", "FLS IDs loaded from the specification or the lock file"),
+    "fls_ids": ("gauge", "FLS IDs counted for coverage"),
+    "fls_coverage_percent": ("gauge", "Percentage of the FLS IDs that are not ignored and covered by a guideline"),
+    "fls_link_documents": ("counter", "Documents scanned and rewritten with links to the FLS"),
+    "fls_links": ("counter", "FLS IDs turned into links"),
+    "guidelines_written": ("gauge", "Guidelines written to guidelines-ids.json"),
+}
+
+
+class BuildMetrics:
+    """Metrics collected during a single build"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # name -> {labels: value}, where labels is a sorted tuple of (label, value)
+        self.values = {name: {} for name in METRICS}
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter"""
+        samples = self.values[name]
+        key = self._labels(labels)
+        samples[key] = samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set a gauge"""
+        self.values[name][self._labels(labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one timed call of a timer"""
+        samples = self.values[name]
+        key = self._labels(labels)
+        count, total = samples.get(key, (0, 0.0))
+        samples[key] = (count + 1, total + seconds)
+
+    def to_json(self):
+        """Return the metrics as a JSON-serialisable dict"""
+        metrics = []
+        for name, (metric_type, help_text) in METRICS.items():
+            samples = []
+            for labels, value in self.values[name].items():
+                sample = {"labels": dict(labels)}
+                if metric_type == "timer":
+                    sample["count"], sample["seconds"] = value[0], round(value[1], 6)
+                else:
+                    sample["value"] = value
+                samples.append(sample)
+            metrics.append({"name": name, "type": metric_type, "help": help_text, "samples": samples})
+        return {"metrics": metrics}
+
+    def to_openmetrics(self):
+        """Return the metrics in the OpenMetrics text format; timers are exported as summaries"""
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            family = PREFIX + name
+            lines.append(f"# TYPE {family} {'summary' if metric_type == 'timer' else metric_type}")
+            lines.append(f"# HELP {family} {help_text}")
+            for labels, value in self.values[name].items():
+                label_text = format_labels(labels)
+                if metric_type == "timer":
+                    lines.append(f"{family}_count{label_text} {value[0]}")
+                    lines.append(f"{family}_sum{label_text} {value[1]:.6f}")
+                elif metric_type == "counter":
+                    lines.append(f"{family}_total{label_text} {value}")
+                else:
+                    lines.append(f"{family}{label_text} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    """Format the labels of a sample, escaped as OpenMetrics requires"""
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def get_build_metrics(app):
+    """Return the metrics of the current build"""
+    if not hasattr(app, "build_metrics"):
+        app.build_metrics = BuildMetrics()
+    return app.build_metrics
+
+
+def start_metrics(app, config):
+    """Hook for config-inited: start the build clock"""
+    get_build_metrics(app)
+
+
+def write_metrics(app, exception):
+    """Hook for build-finished: write the JSON and OpenMetrics exports"""
+    if not app.config.metrics:
+        return
+    metrics = get_build_metrics(app)
+    metrics.set("build_duration_seconds", round(time.perf_counter() - metrics.start, 6))
+    metrics.set("build_succeeded", int(exception is None))
+
+    report_dir = Path(app.outdir).parent
+    try:
+        with open(report_dir / JSON_NAME, "w", encoding="utf-8") as f:
+            json.dump(metrics.to_json(), f, indent=2)
+            f.write("\n")
+        with open(report_dir / OPENMETRICS_NAME, "w", encoding="utf-8") as f:
+            f.write(metrics.to_openmetrics())
+        logger.info(f"Metrics written to {report_dir / JSON_NAME} and {report_dir / OPENMETRICS_NAME}")
+    except OSError as e:
+        logger.warning(f"Failed to write metrics to {report_dir}: {e}")
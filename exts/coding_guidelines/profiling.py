@@ -0,0 +1,217 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Build profiler for the extension.
+
+When the ``profile`` config value is set, every hook connected through
+``connect`` is timed, the major Sphinx phases are marked with wall time and
+peak RSS, and a JSON report is written next to the build output
+(``<outdir>/../profile.json``). With ``profile_cprofile`` the main process is
+additionally profiled with cProfile; the raw stats are saved as
+``profile.prof`` and the most expensive functions are summarised in the report.
+
+Parallel read workers are not profiled; in parallel builds the hook timings
+only cover the hooks run by the main process.
+"""
+
+import functools
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from .common import logger
+from .metrics import get_build_metrics
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# File names of the reports, written to the parent of the output directory
+REPORT_NAME = "profile.json"
+CPROFILE_NAME = "profile.prof"
+
+# Number of functions listed in the cProfile summary of the report
+CPROFILE_TOP = 30
+
+# Phases of a build, as (name, start marker, end marker). Markers are recorded at
+# the very start (priority 0) and very end (priority 1000) of the events.
+PHASES = [
+    ("startup", "config-inited:start", "builder-inited:start"),
+    ("read", "env-before-read-docs:start", "env-updated:start"),
+    ("env-updated", "env-updated:start", "env-updated:end"),
+    ("consistency", "env-check-consistency:start", "env-check-consistency:end"),
+    ("write", "write-started:start", "build-finished:start"),
+    ("finish", "build-finished:start", "build-finished:end"),
+]
+
+# Events whose start and end are marked
+MARKED_EVENTS = [
+    "config-inited",
+    "builder-inited",
+    "env-before-read-docs",
+    "env-updated",
+    "env-check-consistency",
+    "write-started",
+    "build-finished",
+]
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unknown"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class BuildProfile:
+    """Timings collected during a single build"""
+
+    def __init__(self, use_cprofile=False):
+        self.start = time.perf_counter()
+        self.marks = {}
+        self.hooks = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        self.profiler = None
+        if use_cprofile:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def mark(self, name):
+        """Record the time and peak RSS at a named point; the first occurrence wins"""
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self.start, peak_rss_kb())
+
+    def record_hook(self, event, hook, seconds):
+        entry = self.hooks[(event, hook)]
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+    def report(self, app, exception=None):
+        """Return the report as a JSON-serialisable dict"""
+        phases = {}
+        for name, start, end in PHASES:
+            if start in self.marks and end in self.marks:
+                phases[name] = {
+                    "seconds": round(self.marks[end][0] - self.marks[start][0], 6),
+                    # ru_maxrss is a high-water mark: this is the peak up to the end of the phase
+                    "peak_rss_kb": self.marks[end][1],
+                }
+
+        hooks = [
+            {"event": event, "hook": hook, "calls": entry["calls"], "seconds": round(entry["seconds"], 6)}
+            for (event, hook), entry in self.hooks.items()
+        ]
+        hooks.sort(key=lambda entry: entry["seconds"], reverse=True)
+
+        return {
+            "builder": app.builder.name,
+            "parallel": app.parallel,
+            "succeeded": exception is None,
+            "total_seconds": round(time.perf_counter() - self.start, 6),
+            "peak_rss_kb": peak_rss_kb(),
+            "phases": phases,
+            "marks": [
+                {"mark": name, "seconds": round(seconds, 6), "peak_rss_kb": rss}
+                for name, (seconds, rss) in self.marks.items()
+            ],
+            "hooks": hooks,
+        }
+
+
+def get_build_profile(app):
+    """Return the profile of the current build, or None if profiling is disabled"""
+    return getattr(app, "build_profile", None)
+
+
+def connect(app, event, callback, priority=500):
+    """
+    Connect a hook like ``app.connect``, timing it for the build metrics and, when
+    profiling is enabled, for the profile.
+
+    Returns:
+        The listener ID returned by ``app.connect``
+    """
+    hook_name = f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+
+    @functools.wraps(callback)
+    def timed_callback(app, *args):
+        start = time.perf_counter()
+        try:
+            return callback(app, *args)
+        finally:
+            seconds = time.perf_counter() - start
+            get_build_metrics(app).observe("hook_duration_seconds", seconds, event=event, hook=hook_name)
+            profile = get_build_profile(app)
+            if profile is not None:
+                profile.record_hook(event, hook_name, seconds)
+
+    return app.connect(event, timed_callback, priority=priority)
+
+
+def start_profile(app, config):
+    """Hook for config-inited: start profiling if requested"""
+    if config.profile or config.profile_cprofile:
+        app.build_profile = BuildProfile(use_cprofile=bool(config.profile_cprofile))
+
+
+def write_report(app, exception):
+    """Hook for build-finished: write the timing report and cProfile stats"""
+    profile = get_build_profile(app)
+    if profile is None:
+        return
+    profile.mark("build-finished:end")
+
+    report_dir = Path(app.outdir).parent
+    report = profile.report(app, exception)
+
+    if profile.profiler is not None:
+        import pstats
+
+        profile.profiler.disable()
+        stats_path = report_dir / CPROFILE_NAME
+        profile.profiler.dump_stats(stats_path)
+        stats = pstats.Stats(profile.profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:CPROFILE_TOP]
+        report["cprofile"] = {
+            "stats_file": str(stats_path),
+            "top_cumulative": [
+                {
+                    "function": f"{filename}:{line}({function})",
+                    "calls": calls,
+                    "total_seconds": round(total_time, 6),
+                    "cumulative_seconds": round(cumulative_time, 6),
+                }
+                for (filename, line, function), (_, calls, total_time, cumulative_time, _) in top
+            ],
+        }
+
+    report_path = report_dir / REPORT_NAME
+    try:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Profile written to {report_path}")
+    except OSError as e:
+        logger.warning(f"Failed to write profile to {report_path}: {e}")
+
+
+def _marker(name):
+    def mark(app, *args):
+        profile = get_build_profile(app)
+        if profile is not None:
+            profile.mark(name)
+    return mark
+
+
+def register_phase_markers(app):
+    """Connect the hooks that start the profile, mark the build phases and write the report"""
+    app.connect("config-inited", start_profile, priority=0)
+    for event in MARKED_EVENTS:
+        app.connect(event, _marker(f"{event}:start"), priority=0)
+        if event != "build-finished":
+            app.connect(event, _marker(f"{event}:end"), priority=1000)
+    # Runs last, after the other build-finished hooks
+    app.connect("build-finished", write_report, priority=1000)
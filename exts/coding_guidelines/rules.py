@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Rules the guidelines are validated against, and the messages they report.
+
+The Sphinx checks and the standalone linter (``lint_guidelines.py``) share
+these functions, so both report the same errors. This module only uses the
+standard library and has no relative imports: the linter loads it by path
+without importing Sphinx or the rest of the extension.
+"""
+
+import re
+
+# Fields every guideline must set, unless overridden by required_guideline_fields in conf.py
+DEFAULT_REQUIRED_GUIDELINE_FIELDS = ['release', 'fls', 'decidability', 'scope']
+
+# Regular expression for FLS ID validation
+# Format: fls_<12 alphanumeric chars including upper and lowercase>
+fls_pattern = re.compile(r'^fls_[a-zA-Z0-9]{9,12}$')
+
+# Need types every guideline must have exactly one of nested inside it
+GUIDELINE_ELEMENTS = ('rationale', 'non_compliant_example', 'compliant_example')
+
+
+def missing_required_fields(values, required_fields):
+    """Return the required fields that are unset or empty in the values of a guideline"""
+    return [field for field in required_fields if values.get(field) in (None, '', [])]
+
+
+def required_fields_error(values, missing_fields):
+    """Return the error message for a guideline missing required fields"""
+    return (
+        f"Guideline '{values.get('title')}' (ID: {values.get('id')}) "
+        f"in {values.get('docname')}:{values.get('lineno')} is missing the following required fields: "
+        f"{', '.join(missing_fields)}"
+    )
+
+
+def fls_format_error(need_id, fls_value):
+    """Return the error message for a malformed or missing FLS ID of a guideline, or None"""
+    # Check if fls field exists and is not empty
+    if fls_value is None:
+        return f"Need {need_id} has no fls field"
+
+    if fls_value == "":
+        return f"Need {need_id} has empty fls field"
+
+    # Validate FLS ID format
+    if not fls_pattern.match(fls_value):
+        return f"Need {need_id} has invalid fls format: '{fls_value}'. Expected format: fls_ followed by 12 alphanumeric characters"
+
+    return None
+
+
+def nonexistent_fls_ids_error(invalid_ids):
+    """
+    Return the error message for guidelines referencing FLS IDs that are not in the specification.
+
+    Args:
+        invalid_ids: List of (need ID, FLS ID) tuples
+    """
+    error_message = "The following needs reference non-existent FLS IDs:\n"
+    for need_id, fls_id in invalid_ids:
+        error_message += f"  - Need {need_id} references '{fls_id}'\n"
+    return error_message
+
+
+def missing_guideline_elements(element_types):
+    """Return the elements of GUIDELINE_ELEMENTS that are not among the types of a guideline's child needs"""
+    return [element for element in GUIDELINE_ELEMENTS if element not in element_types]
+
+
+def incomplete_guidelines_error(incomplete_guidelines):
+    """
+    Return the error message for guidelines missing a rationale or an example.
+
+    Args:
+        incomplete_guidelines: List of dicts with the 'id', 'title', 'docname' and
+            'missing' elements of each incomplete guideline
+    """
+    error_message = "The following guidelines are missing required elements:\n\n"
+
+    for incomplete in incomplete_guidelines:
+        error_message += f"Guideline: {incomplete['id']} ({incomplete['title']})\n"
+        error_message += f"Location: {incomplete['docname']}\n"
+        error_message += f"Missing: {', '.join(incomplete['missing'])}\n\n"
+
+    error_message += "Each guideline must have an associated rationale, good example, and bad example."
+    return error_message
@@ -0,0 +1,265 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Content-addressed history of spec.lock snapshots.
+
+Consecutive versions of the lock share almost all of their paragraphs, so the
+history stores every paragraph and every section once, as an object keyed by
+the SHA-256 of its canonical JSON, much like git stores blobs and trees::
+
+    <store>/objects                     one "<key> <canonical JSON>" line per
+                                        object, appended to by each snapshot:
+                                        paragraphs, and sections whose
+                                        paragraphs are paragraph keys
+    <store>/manifests/<version>.json    the documents of a version, whose
+                                        sections are section keys
+
+A snapshot only appends the objects that are new. Any version can be
+reconstructed from its manifest, and two versions are compared without
+reconstructing either: sections with the same key are identical and skipped,
+and only the paragraphs of the other sections are decoded.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+HISTORY_FORMAT = 1
+
+OBJECTS_FILE = "objects"
+MANIFESTS_DIR = "manifests"
+
+
+def canonical_json(value):
+    """Serialise a value the same way every time, so equal values get equal keys"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def object_key(data):
+    """Key of an object, from its canonical JSON"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_atomically(path, data):
+    """Write bytes to a file through a temporary file, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class SpecLockHistory:
+    """A history store of spec.lock snapshots"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # The objects file and key -> (offset, length) of each object's JSON in it, read on first use
+        self._buffer = b""
+        self._offsets = None
+        self._end = 0
+        self._decoded = {}
+
+    # Objects
+
+    def _load_offsets(self):
+        if self._offsets is not None:
+            return
+        self._offsets = {}
+        self._end = 0
+        try:
+            with open(self.path / OBJECTS_FILE, "rb") as f:
+                buffer = self._buffer = f.read()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while True:
+            line_end = buffer.find(b"\n", offset)
+            if line_end == -1:
+                # A snapshot interrupted mid-write leaves a partial line, which the next one overwrites
+                break
+            separator = buffer.index(b" ", offset, line_end)
+            self._offsets[buffer[offset:separator].decode("ascii")] = (separator + 1, line_end - separator - 1)
+            offset = line_end + 1
+        self._end = offset
+
+    def _write_objects(self, objects):
+        """Append the objects of a dict of key -> canonical JSON that are not stored yet"""
+        self._load_offsets()
+        new = {key: data for key, data in objects.items() if key not in self._offsets}
+        if not new:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self.path / OBJECTS_FILE
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.seek(self._end)
+            offset = self._end
+            for key, data in new.items():
+                f.write(f"{key} ".encode("ascii") + data + b"\n")
+                self._offsets[key] = (offset + len(key) + 1, len(data))
+                offset += len(key) + 1 + len(data) + 1
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        self._end = offset
+
+    def _put(self, value, pending):
+        """Return the key of an object, adding its canonical JSON to the pending objects"""
+        data = canonical_json(value)
+        key = object_key(data)
+        pending[key] = data
+        self._decoded[key] = value
+        return key
+
+    def _get(self, key):
+        if key not in self._decoded:
+            self._load_offsets()
+            offset, length = self._offsets[key]
+            self._decoded[key] = json.loads(self._buffer[offset:offset + length])
+        return self._decoded[key]
+
+    # Manifests
+
+    def _manifest_path(self, name):
+        return self.path / MANIFESTS_DIR / f"{name}.json"
+
+    def manifest(self, name):
+        """
+        Return the manifest of a version.
+
+        Raises:
+            KeyError: if there is no such version
+        """
+        try:
+            with open(self._manifest_path(name), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"no spec lock snapshot named {name!r} in {self.path}") from None
+        if manifest.get("format") != HISTORY_FORMAT:
+            raise ValueError(f"unsupported spec lock history format {manifest.get('format')!r}")
+        return manifest
+
+    def versions(self):
+        """Return the manifests of all versions, oldest first"""
+        manifests_dir = self.path / MANIFESTS_DIR
+        if not manifests_dir.is_dir():
+            return []
+        manifests = [self.manifest(path.stem) for path in manifests_dir.glob("*.json")]
+        return sorted(manifests, key=lambda manifest: (manifest["created"], manifest["name"]))
+
+    def latest(self):
+        """Return the manifest of the newest version, or None if the history is empty"""
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def add(self, data, name=None, source=None):
+        """
+        Add a snapshot of parsed spec.lock data, unless it is identical to the newest version.
+
+        Args:
+            data: The parsed spec.lock
+            name: Name of the version, by default its creation time in UTC
+            source: Where the data came from, recorded in the manifest
+
+        Returns:
+            Tuple of (name of the version holding the data, whether a new version was added)
+        """
+        pending = {}
+        documents = []
+        paragraphs = 0
+        for document in data.get("documents", []):
+            section_keys = []
+            for section in document.get("sections", []):
+                paragraph_keys = [self._put(paragraph, pending) for paragraph in section.get("paragraphs", [])]
+                paragraphs += len(paragraph_keys)
+                section_keys.append(self._put({**section, "paragraphs": paragraph_keys}, pending))
+            documents.append({**document, "sections": section_keys})
+        extra = {key: value for key, value in data.items() if key != "documents"}
+        # Equal trees mean equal locks, down to every title and link
+        tree = object_key(canonical_json({"extra": extra, "documents": documents}))
+
+        latest = self.latest()
+        if latest is not None and latest["tree"] == tree:
+            return latest["name"], False
+
+        created = time.time()
+        if name is None:
+            name = base_name = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(created))
+            suffix = 1
+            while self._manifest_path(name).exists():
+                suffix += 1
+                name = f"{base_name}-{suffix}"
+        if not re.fullmatch(r"[\w.+-]+", name):
+            raise ValueError(f"invalid spec lock snapshot name {name!r}")
+        if self._manifest_path(name).exists():
+            raise ValueError(f"a spec lock snapshot named {name!r} already exists in {self.path}")
+
+        # Objects first, so that a manifest never refers to missing objects
+        self._write_objects(pending)
+        manifest = {
+            "format": HISTORY_FORMAT,
+            "name": name,
+            "created": created,
+            "source": source,
+            "tree": tree,
+            "paragraphs": paragraphs,
+            "extra": extra,
+            "documents": documents,
+        }
+        write_atomically(self._manifest_path(name), canonical_json(manifest))
+        return name, True
+
+    def reconstruct(self, name):
+        """Return the spec.lock data of a version"""
+        manifest = self.manifest(name)
+        documents = []
+        for document in manifest["documents"]:
+            sections = []
+            for section_key in document["sections"]:
+                section = self._get(section_key)
+                sections.append({**section, "paragraphs": [dict(self._get(key)) for key in section["paragraphs"]]})
+            documents.append({**document, "sections": sections})
+        return {**manifest["extra"], "documents": documents}
+
+    def diff(self, old, new):
+        """
+        Compare the paragraphs of two versions.
+
+        Returns:
+            Dict with lists of paragraphs, sorted by ID:
+            'added' and 'removed' hold the paragraphs of the version they are in,
+            'changed' (checksum differs) and 'moved' (only the number or link differs)
+            hold dicts with the 'old' and 'new' paragraph
+        """
+        old_sections = [key for document in self.manifest(old)["documents"] for key in document["sections"]]
+        new_sections = [key for document in self.manifest(new)["documents"] for key in document["sections"]]
+        # Sections present in both versions are identical down to their paragraphs
+        shared = set(old_sections) & set(new_sections)
+
+        def paragraph_keys(section_keys):
+            keys = {}
+            for section_key in section_keys:
+                if section_key not in shared:
+                    for key in self._get(section_key)["paragraphs"]:
+                        keys[self._get(key)["id"]] = key
+            return keys
+
+        old_paragraphs, new_paragraphs = paragraph_keys(old_sections), paragraph_keys(new_sections)
+        result = {"added": [], "removed": [], "changed": [], "moved": []}
+        for fls_id in sorted(old_paragraphs.keys() | new_paragraphs.keys()):
+            old_key, new_key = old_paragraphs.get(fls_id), new_paragraphs.get(fls_id)
+            if old_key == new_key:
+                continue  # Unchanged paragraph of a section that changed elsewhere
+            if old_key is None:
+                result["added"].append(dict(self._get(new_key)))
+            elif new_key is None:
+                result["removed"].append(dict(self._get(old_key)))
+            else:
+                old_paragraph, new_paragraph = dict(self._get(old_key)), dict(self._get(new_key))
+                kind = "moved" if old_paragraph.get("checksum") == new_paragraph.get("checksum") else "changed"
+                result[kind].append({"old": old_paragraph, "new": new_paragraph})
+        return result
@@ -0,0 +1,784 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Compact binary index of the spec.lock file.
+
+The index is derived from ``spec.lock`` and stored outside the source directory, in
+an index directory under the build directory, named after the lock it was built from.
+It holds one fixed-size record per FLS ID, sorted by ID, plus tables of sections,
+documents and interned strings. The file is memory-mapped, so looking up a single
+ID is a binary search over the mapping and walking all paragraphs never builds the
+JSON tree.
+
+Sections, documents and the whole lock also carry SHA-256 rollup digests of the
+paragraphs below them, forming a hash tree. ``digest_tree`` computes the same tree
+for live data, so two versions can be compared by their root digest and only the
+sections whose digests differ need to be looked at.
+
+Layout (little-endian)::
+
+    header     magic, version, table counts and offsets, source size and mtime, root digest
+    entries    n_entries  x ENTRY    sorted by FLS ID
+    sections   n_sections x SECTION  in lock file order
+    members    u32 entry positions of each section's paragraphs, grouped by section
+    documents  n_docs     x DOCUMENT in lock file order
+    strings    u16 length + UTF-8 bytes, referenced by offset
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+MAGIC = b"FLSLIDX\0"
+VERSION = 2
+INDEX_SUFFIX = ".idx"
+# Directory of the indexes, relative to the doctree directory of a build
+INDEX_DIR_NAME = "spec_lock_index"
+
+# magic, version, n_entries, n_sections, n_documents,
+# entries_off, sections_off, members_off, documents_off, strings_off,
+# source_size, source_mtime_ns, root digest
+HEADER = struct.Struct("<8sIIIIIIIIIQQ32s")
+# id, checksum, flags, section index, number string, link string
+ENTRY = struct.Struct("<24s32sBIII")
+# id string, number string, title string, link string, document index, informational,
+# first member, member count, digest
+SECTION = struct.Struct("<IIIIIBII32s")
+# title string, link string, informational, digest
+DOCUMENT = struct.Struct("<IIB32s")
+MEMBER = struct.Struct("<I")
+STRING_LENGTH = struct.Struct("<H")
+
+ID_SIZE = 24
+
+# Entry flags
+FLAG_CONTAINER = 1
+FLAG_INFORMATIONAL = 2
+# The checksum is not 64 lowercase hex digits and is stored as a string instead
+FLAG_CHECKSUM_STRING = 4
+
+
+def index_path_for(lock_path, index_dir):
+    """
+    Return the path of the index derived from the given lock file.
+
+    The name is keyed by the resolved path of the lock, so the locks of several checkouts
+    or of several forms of the lock can share an index directory.
+
+    Args:
+        lock_path: Path to the lock file, in any of its forms
+        index_dir: Directory holding the indexes
+
+    Returns:
+        Path of the index inside index_dir
+    """
+    lock_path = Path(lock_path)
+    key = hashlib.sha256(str(lock_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(index_dir) / f"{lock_path.name}.{key}{INDEX_SUFFIX}"
+
+
+# Names the lock file may have, in order of preference: plain JSON, or compact JSON
+# compressed with xz or gzip
+LOCK_NAMES = ("spec.lock", "spec.lock.xz", "spec.lock.gz")
+LOCK_FORMATS = ("json", "xz", "gz")
+
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def find_lock(directory):
+    """Return the path of the lock file in a directory, whichever form it is in (spec.lock if none exists)"""
+    directory = Path(directory)
+    for name in LOCK_NAMES:
+        if (directory / name).exists():
+            return directory / name
+    return directory / LOCK_NAMES[0]
+
+
+def lock_format(path):
+    """Format of a lock file from its extension: 'xz', 'gz' or 'json'"""
+    suffix = Path(path).suffix.lstrip(".")
+    return suffix if suffix in ("xz", "gz") else "json"
+
+
+def decode_lock(raw):
+    """Parse the bytes of a lock file, decompressing them first if they start with the gzip or xz magic"""
+    if raw.startswith(GZIP_MAGIC):
+        import gzip
+        raw = gzip.decompress(raw)
+    elif raw.startswith(XZ_MAGIC):
+        import lzma
+        raw = lzma.decompress(raw)
+    return json.loads(raw)
+
+
+def encode_lock(data, fmt="json"):
+    """
+    Serialise lock data canonically, with sorted keys.
+
+    Plain JSON is indented so that diffs of the lock stay reviewable; compressed
+    forms hold compact JSON, and are byte-for-byte reproducible for the same data.
+    """
+    if fmt == "json":
+        return json.dumps(data, indent=4, sort_keys=True).encode("utf-8")
+    compact = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    if fmt == "gz":
+        import gzip
+        # No timestamp, so the same lock always compresses to the same bytes
+        return gzip.compress(compact, compresslevel=9, mtime=0)
+    if fmt == "xz":
+        import lzma
+        return lzma.compress(compact, preset=9 | lzma.PRESET_EXTREME)
+    raise ValueError(f"unknown spec lock format {fmt!r}, expected one of {', '.join(LOCK_FORMATS)}")
+
+
+def read_lock(path):
+    """Read and parse a lock file in any of its forms"""
+    with open(path, "rb") as f:
+        return decode_lock(f.read())
+
+
+def write_lock(path, data, fmt=None):
+    """Write lock data atomically, in the format given or implied by the file extension"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(encode_lock(data, fmt or lock_format(path)))
+    os.replace(tmp_path, path)
+
+
+def _is_hex_checksum(checksum):
+    return len(checksum) == 64 and all(c in "0123456789abcdef" for c in checksum)
+
+
+def document_key(document):
+    """Key identifying a document across versions of the lock"""
+    return document.get("link", "") or document.get("title", "")
+
+
+def section_key(section):
+    """Key identifying a section across versions of the lock"""
+    return section.get("id", "") or section.get("link", "")
+
+
+def chapter_of(number):
+    """
+    Return the chapter of a section or paragraph number: the chapter number as an int
+    for numbers like "22.1:4" or "4.3.1", the letter for appendices like "A.1:2", and
+    'unknown' otherwise.
+    """
+    # Drop the paragraph number after the colon, if any
+    chapter = number.split(':')[0].split('.')[0]
+    if chapter.isdigit():
+        return int(chapter)
+    if number and number[0].isalpha():
+        return number[0]
+    return 'unknown'
+
+
+def parse_fls_paragraph_ids(data, base_url=""):
+    """
+    Build the FLS ID metadata dictionary from parsed paragraph-ids.json data.
+
+    Args:
+        data: The parsed paragraph-ids.json (or spec.lock) contents
+        base_url: Prefix of the links, to make them URLs
+
+    Returns:
+        Dictionary mapping section and paragraph IDs to metadata
+    """
+    all_fls_ids = {}
+
+    # Process each document in the JSON structure
+    for document in data['documents']:
+        doc_title = document.get('title', 'Unknown')
+
+        # Process each section in the document
+        for section in document.get('sections', []):
+            section_title = section.get('title', 'Unknown')
+            section_id = section.get('id', '')
+            section_number = section.get('number', '')
+            section_link = section.get('link', '')
+            is_informational = section.get('informational', False)
+
+            # Add the section container ID if it starts with 'fls_'
+            if section_id and section_id.startswith('fls_'):
+                direct_url = f"{base_url}{section_link}"
+
+                # Store section metadata
+                all_fls_ids[section_id] = {
+                    "url": direct_url,
+                    "section_id": section_number,
+                    "chapter": chapter_of(section_number),
+                    "document_title": doc_title,
+                    "section_title": section_title,
+                    "section_number": section_number,
+                    "is_container": True,  # Mark as a container/section
+                    "informational": is_informational
+                    # Note: No checksum for container IDs
+                }
+
+            # Process each paragraph in the section
+            for paragraph in section.get('paragraphs', []):
+                para_id = paragraph.get('id', '')
+                para_number = paragraph.get('number', '')
+                para_link = paragraph.get('link', '')
+                para_checksum = paragraph.get('checksum', '')
+
+                # Skip entries without proper IDs
+                if not para_id or not para_id.startswith('fls_'):
+                    continue
+
+                # Create the full URL
+                direct_url = f"{base_url}{para_link}"
+
+                # Store metadata
+                all_fls_ids[para_id] = {
+                    "url": direct_url,
+                    "section_id": para_number,
+                    "chapter": chapter_of(para_number),
+                    "document_title": doc_title,
+                    "section_title": section_title,
+                    "section_number": section_number,
+                    "checksum": para_checksum,
+                    "is_container": False,  # Mark as individual paragraph
+                    "parent_section_id": section_id if section_id else None
+                }
+
+    return all_fls_ids
+
+
+def section_digest(paragraphs):
+    """Digest of a section's (FLS ID, checksum, paragraph number) triples, independent of their order"""
+    digest = hashlib.sha256()
+    for para_id, checksum, number in sorted(paragraphs):
+        digest.update(f"{para_id}\0{checksum}\0{number}\n".encode("utf-8"))
+    return digest.digest()
+
+
+def rollup_digest(children):
+    """Digest of (key, digest) pairs of the children of a node, independent of their order"""
+    digest = hashlib.sha256()
+    for key, child_digest in sorted(children):
+        digest.update(key.encode("utf-8") + b"\0" + child_digest)
+    return digest.digest()
+
+
+def section_paragraphs(section):
+    """Yield (FLS ID, checksum, paragraph number) for the paragraphs of a parsed section"""
+    for paragraph in section.get("paragraphs", []):
+        para_id = paragraph.get("id", "")
+        if para_id and para_id.startswith("fls_"):
+            yield para_id, paragraph.get("checksum", ""), paragraph.get("number", "")
+
+
+def digest_tree(data):
+    """
+    Compute the hash tree of parsed paragraph-ids.json / spec.lock data.
+
+    Returns:
+        Tuple of (root digest, {document key: (document digest, {section key: section digest})})
+    """
+    documents = {}
+    for document in data.get("documents", []):
+        sections = {}
+        for section in document.get("sections", []):
+            sections[section_key(section)] = section_digest(section_paragraphs(section))
+        documents[document_key(document)] = (rollup_digest(sections.items()), sections)
+    root = rollup_digest((key, digest) for key, (digest, _) in documents.items())
+    return root, documents
+
+
+def changed_section_keys(tree, other_tree):
+    """
+    Descend two hash trees from the root and collect the keys of differing sections.
+
+    Returns:
+        Set of section keys whose digest differs or that exist in only one tree
+    """
+    root, documents = tree
+    other_root, other_documents = other_tree
+    changed = set()
+    if root == other_root:
+        return changed
+
+    for doc_key in documents.keys() | other_documents.keys():
+        digest, sections = documents.get(doc_key, (None, {}))
+        other_digest, other_sections = other_documents.get(doc_key, (None, {}))
+        if digest == other_digest:
+            continue
+        for key in sections.keys() | other_sections.keys():
+            if sections.get(key) != other_sections.get(key):
+                changed.add(key)
+    return changed
+
+
+def validate_lock(data):
+    """
+    Check that parsed data has the structure of a lock file, with unique FLS IDs.
+
+    Raises:
+        ValueError: describing the first problem found
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("documents"), list):
+        raise ValueError("expected an object with a 'documents' list")
+    seen = set()
+    for document in data["documents"]:
+        if not isinstance(document, dict) or not isinstance(document.get("sections"), list):
+            raise ValueError("a document has no 'sections' list")
+        for section in document["sections"]:
+            if not isinstance(section, dict) or not isinstance(section.get("paragraphs"), list):
+                raise ValueError("a section has no 'paragraphs' list")
+            for paragraph in section["paragraphs"]:
+                if not isinstance(paragraph, dict) or not all(
+                    isinstance(paragraph.get(key), str) for key in ("id", "checksum", "number")
+                ):
+                    raise ValueError(f"section {section.get('number')} has a paragraph without an id, checksum or number")
+                if paragraph["id"] in seen:
+                    raise ValueError(f"FLS ID {paragraph['id']} appears more than once")
+                seen.add(paragraph["id"])
+    if not seen:
+        raise ValueError("no paragraphs")
+
+
+def lock_changes(index, data):
+    """
+    Compare new lock data with the lock an index was built from.
+
+    Only the sections whose digests differ in the hash trees are compared.
+
+    Returns:
+        Dict with the sorted FLS IDs 'added', 'removed' and 'changed' (checksum or number differs)
+    """
+    changed_sections = changed_section_keys(digest_tree(data), index.digest_tree())
+    new = {
+        fls_id: (checksum, number)
+        for document in data.get("documents", [])
+        for section in document.get("sections", [])
+        if section_key(section) in changed_sections
+        for fls_id, checksum, number in section_paragraphs(section)
+    }
+    old = {fls_id: (checksum, number) for fls_id, checksum, number in index.changed_paragraphs(changed_sections)}
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(fls_id for fls_id in new.keys() & old.keys() if new[fls_id] != old[fls_id]),
+    }
+
+
+class _StringTable:
+    """Interned UTF-8 strings addressed by byte offset"""
+
+    def __init__(self):
+        self.offsets = {}
+        self.chunks = []
+        self.size = 0
+
+    def add(self, value):
+        offset = self.offsets.get(value)
+        if offset is None:
+            encoded = value.encode("utf-8")
+            offset = self.size
+            self.offsets[value] = offset
+            self.chunks.append(STRING_LENGTH.pack(len(encoded)))
+            self.chunks.append(encoded)
+            self.size += STRING_LENGTH.size + len(encoded)
+        return offset
+
+    def to_bytes(self):
+        return b"".join(self.chunks)
+
+
+def build_index_bytes(data, source_size=0, source_mtime_ns=0):
+    """
+    Serialize parsed spec lock data into the binary index format.
+
+    Args:
+        data: The parsed contents of a spec.lock / paragraph-ids.json file
+        source_size: Size in bytes of the lock file the data was read from
+        source_mtime_ns: Modification time of the lock file the data was read from
+
+    Returns:
+        The index as bytes
+    """
+    strings = _StringTable()
+    documents = []
+    sections = []
+    # Paragraph IDs of each section, in lock file order
+    section_members = []
+    # FLS ID -> entry tuple; later occurrences win, like in gather_fls_paragraph_ids
+    entries = {}
+    document_digests = {}
+
+    for document in data.get("documents", []):
+        doc_index = len(documents)
+        section_digests = {}
+
+        for section in document.get("sections", []):
+            section_index = len(sections)
+            section_id = section.get("id", "")
+            section_number = section.get("number", "")
+            section_link = section.get("link", "")
+            is_informational = bool(section.get("informational", False))
+
+            if section_id and section_id.startswith("fls_"):
+                flags = FLAG_CONTAINER | (FLAG_INFORMATIONAL if is_informational else 0)
+                entries[section_id] = (
+                    b"", flags, section_index,
+                    strings.add(section_number), strings.add(section_link),
+                )
+
+            members = []
+            paragraphs = []
+            for paragraph in section.get("paragraphs", []):
+                para_id = paragraph.get("id", "")
+                if not para_id or not para_id.startswith("fls_"):
+                    continue
+                checksum = paragraph.get("checksum", "")
+                number = paragraph.get("number", "")
+                flags = 0
+                if _is_hex_checksum(checksum):
+                    checksum_field = bytes.fromhex(checksum)
+                else:
+                    flags |= FLAG_CHECKSUM_STRING
+                    checksum_field = struct.pack("<I", strings.add(checksum))
+                entries[para_id] = (
+                    checksum_field, flags, section_index,
+                    strings.add(number), strings.add(paragraph.get("link", "")),
+                )
+                members.append(para_id)
+                paragraphs.append((para_id, checksum, number))
+            section_members.append(members)
+
+            digest = section_digest(paragraphs)
+            section_digests[section_key(section)] = digest
+            sections.append((
+                strings.add(section_id),
+                strings.add(section_number),
+                strings.add(section.get("title", "Unknown")),
+                strings.add(section_link),
+                doc_index,
+                is_informational,
+                digest,
+            ))
+
+        digest = rollup_digest(section_digests.items())
+        document_digests[document_key(document)] = digest
+        documents.append(DOCUMENT.pack(
+            strings.add(document.get("title", "Unknown")),
+            strings.add(document.get("link", "")),
+            bool(document.get("informational", False)),
+            digest,
+        ))
+
+    sorted_ids = sorted(entries)
+    positions = {fls_id: position for position, fls_id in enumerate(sorted_ids)}
+
+    entry_chunks = []
+    for fls_id in sorted_ids:
+        encoded_id = fls_id.encode("utf-8")
+        if len(encoded_id) > ID_SIZE:
+            raise ValueError(f"FLS ID too long for the spec lock index: {fls_id}")
+        entry_chunks.append(ENTRY.pack(encoded_id, *entries[fls_id]))
+
+    section_chunks = []
+    member_chunks = []
+    for (*fields, digest), members in zip(sections, section_members):
+        section_chunks.append(SECTION.pack(*fields, len(member_chunks), len(members), digest))
+        member_chunks.extend(MEMBER.pack(positions[para_id]) for para_id in members)
+
+    entries_off = HEADER.size
+    sections_off = entries_off + len(entries) * ENTRY.size
+    members_off = sections_off + len(sections) * SECTION.size
+    documents_off = members_off + len(member_chunks) * MEMBER.size
+    strings_off = documents_off + len(documents) * DOCUMENT.size
+
+    header = HEADER.pack(
+        MAGIC, VERSION, len(entries), len(sections), len(documents),
+        entries_off, sections_off, members_off, documents_off, strings_off,
+        source_size, source_mtime_ns, rollup_digest(document_digests.items()),
+    )
+    return b"".join([header, *entry_chunks, *section_chunks, *member_chunks, *documents, strings.to_bytes()])
+
+
+def write_index(lock_path, index_dir, data=None):
+    """
+    (Re)generate the index of the lock file.
+
+    Args:
+        lock_path: Path to the lock file, in any of its forms
+        index_dir: Directory holding the indexes, created if missing
+        data: The already parsed lock file contents, read from lock_path if omitted
+
+    Returns:
+        Path of the written index
+    """
+    lock_path = Path(lock_path)
+    stat = lock_path.stat()
+    if data is None:
+        data = read_lock(lock_path)
+
+    index_bytes = build_index_bytes(data, stat.st_size, stat.st_mtime_ns)
+    index_path = index_path_for(lock_path, index_dir)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(index_bytes)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class SpecLockIndex:
+    """Read-only view of a spec lock index"""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        (magic, version, self._n_entries, self._n_sections, self._n_documents,
+         self._entries_off, self._sections_off, self._members_off, self._documents_off, self._strings_off,
+         self.source_size, self.source_mtime_ns, self.root_digest) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a spec lock index or unsupported index version")
+        # Section position -> decoded section metadata, shared by all the entries of a section
+        self._sections = {}
+
+    @classmethod
+    def open(cls, lock_path, index_dir):
+        """
+        Open the index for a lock file, regenerating it first if it is missing or stale.
+
+        Args:
+            lock_path: Path to the spec.lock file
+            index_dir: Directory holding the indexes, created if missing
+
+        Returns:
+            A SpecLockIndex backed by a memory-mapped file when possible
+        """
+        lock_path = Path(lock_path)
+        stat = lock_path.stat()
+        index_path = index_path_for(lock_path, index_dir)
+
+        index = cls._map(index_path)
+        if index is not None and (index.source_size, index.source_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return index
+
+        try:
+            index = cls._map(write_index(lock_path, index_dir))
+        except OSError:
+            index = None
+        if index is None:
+            # Unwritable index directory: keep the index in memory for this process
+            return cls._from_lock(lock_path)
+        return index
+
+    @classmethod
+    def _map(cls, index_path):
+        try:
+            with open(index_path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(buffer)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @classmethod
+    def _from_lock(cls, lock_path):
+        stat = Path(lock_path).stat()
+        data = read_lock(lock_path)
+        return cls(build_index_bytes(data, stat.st_size, stat.st_mtime_ns))
+
+    def __len__(self):
+        return self._n_entries
+
+    def __contains__(self, fls_id):
+        return self._find(fls_id) >= 0
+
+    def _string(self, offset):
+        start = self._strings_off + offset
+        (length,) = STRING_LENGTH.unpack_from(self._buffer, start)
+        start += STRING_LENGTH.size
+        return self._buffer[start:start + length].decode("utf-8")
+
+    def _entry_id(self, position):
+        start = self._entries_off + position * ENTRY.size
+        return bytes(self._buffer[start:start + ID_SIZE])
+
+    def _find(self, fls_id):
+        """Binary search for an FLS ID, returning its entry position or -1"""
+        key = fls_id.encode("utf-8").ljust(ID_SIZE, b"\0")
+        if len(key) > ID_SIZE:
+            return -1
+        low, high = 0, self._n_entries
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry_id(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._n_entries and self._entry_id(low) == key:
+            return low
+        return -1
+
+    def _entry(self, position):
+        raw_id, checksum, flags, section_index, number, link = ENTRY.unpack_from(
+            self._buffer, self._entries_off + position * ENTRY.size
+        )
+        if flags & FLAG_CONTAINER:
+            checksum = None
+        elif flags & FLAG_CHECKSUM_STRING:
+            checksum = self._string(struct.unpack_from("<I", checksum)[0])
+        else:
+            checksum = checksum.hex()
+        return raw_id.rstrip(b"\0").decode("utf-8"), checksum, flags, section_index, number, link
+
+    def section(self, section_index):
+        """Return the metadata of the section at the given position, decoded once per index"""
+        section = self._sections.get(section_index)
+        if section is None:
+            section = self._sections[section_index] = self._decode_section(section_index)
+        return section
+
+    def _decode_section(self, section_index):
+        id_off, number, title, link, doc_index, informational, _, _, _ = SECTION.unpack_from(
+            self._buffer, self._sections_off + section_index * SECTION.size
+        )
+        doc_title, doc_link, doc_informational, _ = DOCUMENT.unpack_from(
+            self._buffer, self._documents_off + doc_index * DOCUMENT.size
+        )
+        return {
+            "id": self._string(id_off),
+            "number": self._string(number),
+            "title": self._string(title),
+            "link": self._string(link),
+            "informational": bool(informational),
+            "document_title": self._string(doc_title),
+            "document_link": self._string(doc_link),
+        }
+
+    def _metadata(self, position, base_url):
+        fls_id, checksum, flags, section_index, number, link = self._entry(position)
+        section = self.section(section_index)
+        number = self._string(number)
+        metadata = {
+            "url": f"{base_url}{self._string(link)}",
+            "section_id": number,
+            "chapter": chapter_of(number),
+            "document_title": section["document_title"],
+            "section_title": section["title"],
+            "section_number": section["number"],
+        }
+        if flags & FLAG_CONTAINER:
+            metadata["is_container"] = True
+            metadata["informational"] = bool(flags & FLAG_INFORMATIONAL)
+        else:
+            metadata["checksum"] = checksum
+            metadata["is_container"] = False
+            metadata["parent_section_id"] = section["id"] or None
+        return fls_id, metadata
+
+    def lookup(self, fls_id, base_url=""):
+        """
+        Look up a single FLS ID.
+
+        Returns:
+            The metadata dictionary in the format of gather_fls_paragraph_ids, or None
+        """
+        position = self._find(fls_id)
+        if position < 0:
+            return None
+        return self._metadata(position, base_url)[1]
+
+    def items(self, base_url=""):
+        """Yield (FLS ID, metadata) for every section and paragraph, sorted by ID"""
+        buffer = self._buffer
+        strings_off = self._strings_off
+        unpack_length, length_size = STRING_LENGTH.unpack_from, STRING_LENGTH.size
+        chapters = {}
+        # Unpack the entry table in one go rather than entry by entry
+        entries = buffer[self._entries_off:self._entries_off + self._n_entries * ENTRY.size]
+        for raw_id, checksum, flags, section_index, number, link in ENTRY.iter_unpack(entries):
+            section = self.section(section_index)
+            # Decode the two strings inline, this loop runs for every FLS ID of the build
+            start = strings_off + number
+            number = buffer[start + length_size:start + length_size + unpack_length(buffer, start)[0]].decode("utf-8")
+            start = strings_off + link
+            link = buffer[start + length_size:start + length_size + unpack_length(buffer, start)[0]].decode("utf-8")
+            # Paragraphs share their chapter with their section, the part of the number before the colon
+            prefix = number.partition(":")[0]
+            chapter = chapters.get(prefix)
+            if chapter is None:
+                chapter = chapters[prefix] = chapter_of(number)
+            metadata = {
+                "url": base_url + link,
+                "section_id": number,
+                "chapter": chapter,
+                "document_title": section["document_title"],
+                "section_title": section["title"],
+                "section_number": section["number"],
+            }
+            if flags & FLAG_CONTAINER:
+                metadata["is_container"] = True
+                metadata["informational"] = bool(flags & FLAG_INFORMATIONAL)
+            else:
+                if flags & FLAG_CHECKSUM_STRING:
+                    checksum = self._string(struct.unpack_from("<I", checksum)[0])
+                else:
+                    checksum = checksum.hex()
+                metadata["checksum"] = checksum
+                metadata["is_container"] = False
+                metadata["parent_section_id"] = section["id"] or None
+            yield raw_id.rstrip(b"\0").decode("utf-8"), metadata
+
+    def paragraphs(self):
+        """Yield (FLS ID, checksum, paragraph number) for every paragraph, sorted by ID"""
+        for position in range(self._n_entries):
+            fls_id, checksum, flags, _, number, _ = self._entry(position)
+            if not flags & FLAG_CONTAINER:
+                yield fls_id, checksum, self._string(number)
+
+    def paragraph(self, fls_id):
+        """Return (checksum, paragraph number) for a paragraph ID, or None"""
+        position = self._find(fls_id)
+        if position < 0:
+            return None
+        _, checksum, flags, _, number, _ = self._entry(position)
+        if flags & FLAG_CONTAINER:
+            return None
+        return checksum, self._string(number)
+
+    def digest_tree(self):
+        """
+        Return the hash tree stored in the index, in the format of digest_tree.
+
+        Only the section and document tables are read; no paragraph is visited.
+        """
+        documents = {}
+        document_sections = {}
+        for section_index in range(self._n_sections):
+            id_off, _, _, link, doc_index, _, _, _, digest = SECTION.unpack_from(
+                self._buffer, self._sections_off + section_index * SECTION.size
+            )
+            key = self._string(id_off) or self._string(link)
+            document_sections.setdefault(doc_index, {})[key] = digest
+        for doc_index in range(self._n_documents):
+            title, link, _, digest = DOCUMENT.unpack_from(
+                self._buffer, self._documents_off + doc_index * DOCUMENT.size
+            )
+            key = self._string(link) or self._string(title)
+            documents[key] = (digest, document_sections.get(doc_index, {}))
+        return self.root_digest, documents
+
+    def changed_paragraphs(self, section_keys):
+        """Yield (FLS ID, checksum, paragraph number) for the paragraphs of the given sections"""
+        for section_index in range(self._n_sections):
+            id_off, _, _, link, _, _, first, count, _ = SECTION.unpack_from(
+                self._buffer, self._sections_off + section_index * SECTION.size
+            )
+            if (self._string(id_off) or self._string(link)) not in section_keys:
+                continue
+            for member in range(first, first + count):
+                (position,) = MEMBER.unpack_from(self._buffer, self._members_off + member * MEMBER.size)
+                fls_id, checksum, _, _, number, _ = self._entry(position)
+                yield fls_id, checksum, self._string(number)
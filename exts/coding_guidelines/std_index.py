@@ -0,0 +1,354 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Offline index of the items of the Rust standard library crates.
+
+The index is generated from the ``all.html`` pages rustdoc writes for every
+crate, either from a local copy of the documentation (``rustup doc --path``)
+or from doc.rust-lang.org, and is stored as ``src/std_items.json``. The pages
+of types and traits are read as well, for the anchors of their own members:
+fields, variants, inherent methods and the items of a trait. At build start
+the items are loaded into a trie keyed by path segment, which the ``:std:``
+role uses to turn paths such as ``core::mem::transmute`` or ``Option::map``
+into direct links to the rustdoc pages.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from .common import logger
+
+# Version of the index file format
+INDEX_FORMAT = 2
+
+# Crates indexed, in the order a path without a crate prefix is looked up in
+INDEXED_CRATES = ("std", "core", "alloc")
+
+# Type and trait pages read at once when building the index
+PAGE_READERS = 16
+
+# Kinds of items rustdoc lists in all.html, by the prefix of their file name
+ITEM_KINDS = (
+    "struct", "enum", "union", "primitive", "trait", "traitalias", "macro",
+    "attr", "derive", "fn", "type", "constant", "static", "keyword",
+)
+
+# When a path names several items, e.g. the std::vec module and the vec! macro, and
+# the reference does not say which one it means, the kind listed first is linked
+KIND_PRIORITY = {
+    kind: i for i, kind in enumerate(dict.fromkeys(("primitive", "struct", "enum", "union", "trait", "type", "mod", *ITEM_KINDS)))
+}
+
+# Kinds whose members are documented on their page, linked with an anchor
+KINDS_WITH_MEMBERS = ("struct", "enum", "union", "primitive", "trait")
+
+# Kinds of members, by the prefix of their anchor; when members of a type share a
+# name, e.g. a field and a method, the kind listed first is linked
+MEMBER_KINDS = ("method", "tymethod", "variant", "associatedconstant", "associatedtype", "structfield")
+
+# Kinds that paths without a module, such as Option::map or asm!, may start with
+SHORT_NAME_KINDS = ("struct", "enum", "union", "primitive", "trait", "type", "macro")
+
+item_href_pattern = re.compile(r'href="((?:[a-z0-9_]+/)*)(' + "|".join(ITEM_KINDS) + r')\.([A-Za-z0-9_]+)\.html"')
+channel_pattern = re.compile(r'data-channel="([^"]+)"')
+# Anchors that repeat a name on a page get a -N suffix and are not matched
+member_anchor_pattern = re.compile(r'id="(' + "|".join(MEMBER_KINDS) + r')\.([A-Za-z0-9_]+)"')
+# Sections of a type or trait page after its own members: the trait implementations of
+# a type, whose methods belong to the traits, and the implementors of a trait
+foreign_members_pattern = re.compile(
+    r'id="(?:trait-implementations|synthetic-implementations|blanket-implementations|implementors|foreign-impls)"'
+)
+
+
+def parse_all_items(crate, html):
+    """
+    Parse the all.html page of a crate.
+
+    Returns:
+        Tuple of (dict of item path -> comma-separated kinds, rust version or None)
+    """
+    items = {}
+    for module_path, kind, name in item_href_pattern.findall(html):
+        modules = [segment for segment in module_path.split("/") if segment]
+        # Every directory on the way to an item is a module
+        for depth in range(1, len(modules) + 1):
+            items.setdefault("::".join([crate, *modules[:depth]]), set()).add("mod")
+        # The platform intrinsics under core::arch make up most of core but are not
+        # referenced from guidelines; keep the arch modules and macros such as asm!
+        if modules[:1] == ["arch"] and len(modules) > 1:
+            continue
+        items.setdefault("::".join([crate, *modules, name]), set()).add(kind)
+    channel = channel_pattern.search(html)
+    return {path: ",".join(sorted(kinds)) for path, kinds in items.items()}, channel.group(1) if channel else None
+
+
+def parse_members(html):
+    """
+    Parse the rustdoc page of a type or trait.
+
+    Returns:
+        The sorted anchors of its own members, such as ``method.push`` or ``variant.Some``
+    """
+    end = foreign_members_pattern.search(html)
+    kinds = {}
+    for kind, name in member_anchor_pattern.findall(html, 0, end.start() if end else len(html)):
+        if name not in kinds or MEMBER_KINDS.index(kind) < MEMBER_KINDS.index(kinds[name]):
+            kinds[name] = kind
+    return sorted(f"{kind}.{name}" for name, kind in kinds.items())
+
+
+def read_doc_page(source, page):
+    """Read a page, given relative to the crate directories, from a documentation directory or URL"""
+    if re.match(r"https?://", source):
+        import requests
+
+        response = requests.get(f"{source.rstrip('/')}/{page}", timeout=30)
+        response.raise_for_status()
+        return response.text
+    with open(Path(source) / page, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_all_items_page(source, crate):
+    """Read the all.html page of a crate from a documentation directory or URL"""
+    return read_doc_page(source, f"{crate}/all.html")
+
+
+def read_members(source, items):
+    """
+    Read the members of the types and traits among the items of a crate.
+
+    Returns:
+        Dict of item path -> space-separated anchors of its members, for the items that have any
+    """
+    # Deferred: only needed when the index is built
+    from concurrent.futures import ThreadPoolExecutor
+
+    pages = [
+        (path, item_url("", path.split("::"), kind).lstrip("/"))
+        for path, kinds in items.items()
+        for kind in kinds.split(",")
+        if kind in KINDS_WITH_MEMBERS
+    ]
+    anchors = {}
+    with ThreadPoolExecutor(max_workers=PAGE_READERS) as executor:
+        htmls = executor.map(lambda page: read_doc_page(source, page), [page for _, page in pages])
+        for (path, _), html in zip(pages, htmls):
+            anchors.setdefault(path, set()).update(parse_members(html))
+    return {path: " ".join(sorted(path_anchors)) for path, path_anchors in anchors.items() if path_anchors}
+
+
+def build_std_index(source):
+    """
+    Build the std item index from rustdoc output.
+
+    Args:
+        source: Directory holding the rustdoc output of the standard library
+            (e.g. the parent of ``rustup doc --path``) or its URL
+
+    Returns:
+        The index as a JSON-serialisable dict
+    """
+    crates = {}
+    members = {}
+    rust_version = None
+    for crate in INDEXED_CRATES:
+        items, channel = parse_all_items(crate, read_all_items_page(source, crate))
+        crates[crate] = dict(sorted(items.items()))
+        members[crate] = dict(sorted(read_members(source, items).items()))
+        rust_version = rust_version or channel
+    return {"format": INDEX_FORMAT, "rust_version": rust_version, "crates": crates, "members": members}
+
+
+def write_std_index(index, path):
+    """Write the index with one item per line, so updates diff well"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=0, sort_keys=True)
+        f.write("\n")
+
+
+class StdItemTrie:
+    """Prefix trie of std item paths, keyed by path segment"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, path, kinds):
+        node = self.root
+        for segment in path.split("::"):
+            node = node.setdefault(segment, {})
+        # None cannot clash with a path segment
+        node[None] = kinds
+
+    def longest_prefix(self, segments):
+        """
+        Find the longest prefix of the segments that is an item.
+
+        Returns:
+            Tuple of (number of segments matched, kinds of the item), or (0, None) if none match
+        """
+        node = self.root
+        match = (0, None)
+        for depth, segment in enumerate(segments, start=1):
+            node = node.get(segment)
+            if node is None:
+                break
+            if None in node:
+                match = (depth, node[None])
+        return match
+
+
+def pick_kind(kinds, wanted=None):
+    """Pick the kind to link from the kinds of the items sharing a path"""
+    if wanted in kinds:
+        return wanted
+    return min(kinds, key=KIND_PRIORITY.__getitem__)
+
+
+class StdIndex:
+    """The loaded std item index"""
+
+    def __init__(self, index):
+        self.rust_version = index.get("rust_version")
+        self.trie = StdItemTrie()
+        for items in index["crates"].values():
+            for path, kinds in items.items():
+                self.trie.insert(path, tuple(kinds.split(",")))
+        # Item path -> anchors of its members, split into a dict of name -> anchor on first use
+        self.member_anchors = {}
+        for members in index.get("members", {}).values():
+            self.member_anchors.update(members)
+        self._members = {}
+
+        # Names of types, traits and macros, mapped to their path. Names are looked up in
+        # the crates in order; within a crate the item with the kind listed first in
+        # KIND_PRIORITY wins and a tie makes the name ambiguous.
+        self.short_names = {}
+        for crate in INDEXED_CRATES:
+            best = {}
+            for path, kinds in index["crates"].get(crate, {}).items():
+                short_kinds = [kind for kind in kinds.split(",") if kind in SHORT_NAME_KINDS]
+                if not short_kinds:
+                    continue
+                name = path.rsplit("::", 1)[-1]
+                priority = min(KIND_PRIORITY[kind] for kind in short_kinds)
+                if name not in best or priority < best[name][0]:
+                    best[name] = (priority, path)
+                elif priority == best[name][0]:
+                    best[name] = (priority, None)
+            for name, (_, path) in best.items():
+                self.short_names.setdefault(name, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != INDEX_FORMAT:
+            raise ValueError(f"unsupported std item index format {index.get('format')!r}")
+        return cls(index)
+
+    def members(self, path):
+        """Return the members of a type or trait as a dict of name -> anchor, e.g. push -> method.push"""
+        members = self._members.get(path)
+        if members is None:
+            anchors = self.member_anchors.get(path, "").split()
+            members = self._members[path] = {anchor.split(".", 1)[1]: anchor for anchor in anchors}
+        return members
+
+    def resolve(self, target, docs_root):
+        """
+        Resolve a path such as ``core::mem::transmute``, ``Vec::push`` or ``vec!`` to the URL
+        of its rustdoc page.
+
+        Args:
+            target: The path to resolve
+            docs_root: URL the crate documentation directories are under
+
+        Returns:
+            The URL, or None if the path, or the member it names, is not in the index
+        """
+        path = re.sub(r"<[^<>]*>", "", target.strip())  # Drop generic arguments
+        wanted = None
+        if path.endswith("!"):
+            path, wanted = path[:-1], "macro"
+        elif path.endswith("()"):
+            path, wanted = path[:-2], "fn"
+        segments = [segment for segment in path.split("::") if segment]
+        if not segments:
+            return None
+
+        candidates = [segments]
+        if segments[0] not in INDEXED_CRATES:
+            candidates = [[crate, *segments] for crate in INDEXED_CRATES]
+            if self.short_names.get(segments[0]):
+                candidates.insert(0, [*self.short_names[segments[0]].split("::"), *segments[1:]])
+
+        for candidate in candidates:
+            depth, kinds = self.trie.longest_prefix(candidate)
+            if kinds is None:
+                continue
+            members = candidate[depth:]
+            if not members:
+                return item_url(docs_root, candidate, pick_kind(kinds, wanted))
+            # Only a single member of a type or trait can be linked to, with the anchor of its kind
+            member_kinds = [kind for kind in kinds if kind in KINDS_WITH_MEMBERS]
+            if len(members) == 1 and member_kinds:
+                anchor = self.members("::".join(candidate[:depth])).get(members[0])
+                if anchor is not None:
+                    return f"{item_url(docs_root, candidate[:depth], pick_kind(member_kinds))}#{anchor}"
+        return None
+
+
+def item_url(docs_root, segments, kind):
+    """URL of the rustdoc page of an item"""
+    crate, *rest = segments
+    if kind == "mod":
+        return "/".join([docs_root, crate, *rest, "index.html"])
+    *modules, name = rest
+    return "/".join([docs_root, crate, *modules, f"{kind}.{name}.html"])
+
+
+def docs_root_url(std_docs_url):
+    """Turn the std documentation URL (e.g. .../stable/std) into the URL of the crate directories"""
+    std_docs_url = std_docs_url.rstrip("/")
+    if std_docs_url.endswith("/std"):
+        return std_docs_url[: -len("/std")]
+    return std_docs_url
+
+
+def load_std_index(app):
+    """
+    Hook for builder-inited: load the std item index once per process.
+
+    It is loaded before parallel readers are forked, so they share it.
+    """
+    if hasattr(app, "std_index"):
+        return
+    path = Path(app.confdir) / app.config.std_items_index
+    try:
+        app.std_index = StdIndex.load(path)
+        with open(path, "rb") as f:
+            app.std_index_digest = hashlib.sha256(f.read()).hexdigest()
+        logger.info(f"Loaded std item index for Rust {app.std_index.rust_version} from {path}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load std item index {path} ({e}); :std: roles will link to the search page")
+        app.std_index = None
+        app.std_index_digest = None
+
+
+def outdated_std_refs(app, env, added, changed, removed):
+    """
+    Hook for env-get-outdated: re-read the documents with :std: roles when the index changed.
+
+    Returns:
+        List of docnames to re-read
+    """
+    previous_digest = getattr(env, "std_index_digest", None)
+    env.std_index_digest = app.std_index_digest
+    if previous_digest is None or previous_digest == app.std_index_digest:
+        return []
+    std_refs = env.get_domain("coding-guidelines").data["std_refs"]
+    return [docname for docname in std_refs if docname not in removed]
@@ -5,10 +5,17 @@ from docutils import nodes
 from sphinx.roles import SphinxRole
 from urllib.parse import quote
 
+from .common import logger
+from .std_index import docs_root_url
+
 class StdRefRole(SphinxRole):
     def run(self):
         text, target = parse_target_from_text(self.text)
-        url = f"{self.env.config.spec_std_docs_url}/?search={quote(target)}"
+        std_refs = self.env.get_domain("coding-guidelines").data["std_refs"]
+        std_refs.setdefault(self.env.docname, []).append(target)
+        url = resolve_std_url(self.env, target, self.get_location())
+        if url is None:
+            url = f"{self.env.config.spec_std_docs_url}/?search={quote(target)}"
 
         node = nodes.reference(internal=False, refuri=url)
         node += nodes.literal("", text)
@@ -16,6 +23,25 @@ class StdRefRole(SphinxRole):
         return [node], []
 
 
+def resolve_std_url(env, target, location):
+    """
+    Resolve a :std: target to the URL of its rustdoc page through the std item index.
+
+    Returns:
+        The URL, or None if the index is not available or does not contain the target
+    """
+    std_index = getattr(env.app, "std_index", None)
+    if std_index is None:
+        return None
+    url = std_index.resolve(target, docs_root_url(env.config.spec_std_docs_url))
+    if url is None:
+        logger.warning(
+            f"{location}: std reference '{target}' not found in the std item index "
+            f"(Rust {std_index.rust_version}), linking to the search page instead"
+        )
+    return url
+
+
 def parse_target_from_text(text):
     if "<" in text and text.endswith(">"):
         target_start = text.rfind("<")
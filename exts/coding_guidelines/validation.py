@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Single-pass validation engine for the needs of a build.
+
+Checks are registered with ``register_check`` from the extension's ``setup``.
+On ``env-check-consistency`` the needs are partitioned by type once, every need
+is visited once, and each check receives only the fields it declared. After the
+traversal each check's ``finish`` runs in registration order; it raises the
+check's error, if any.
+"""
+
+from collections import defaultdict
+from .common import logger, get_tqdm, bar_format
+from .metrics import get_build_metrics
+
+
+class NeedsIndex:
+    """Needs of the current build, partitioned by type"""
+
+    def __init__(self, needs):
+        self.needs = needs
+        self.by_type = defaultdict(dict)
+        for need_id, need in needs.items():
+            self.by_type[need.get('type')][need_id] = need
+
+    def of_type(self, need_type):
+        """Return a dict of need ID to need for all needs of the given type"""
+        return self.by_type.get(need_type, {})
+
+
+class NeedCheck:
+    """
+    Base class for checks run by the validation engine.
+
+    Subclasses set ``need_type`` and ``fields``, collect what they need in ``visit``
+    and report problems in ``finish``.
+    """
+
+    # Type of the needs this check visits
+    need_type = 'guideline'
+    # Fields of the need this check reads
+    fields = ()
+
+    def __init__(self, app):
+        self.app = app
+
+    def visit(self, need_id, values):
+        """Called once per need of ``need_type`` with a dict of the declared fields"""
+
+    def finish(self, app, env):
+        """Called after the traversal; raise a SphinxError to fail the build"""
+
+
+def register_check(app, check_class):
+    """Register a NeedCheck subclass to run on every consistency check"""
+    if not hasattr(app, 'need_checks'):
+        app.need_checks = []
+    app.need_checks.append(check_class)
+
+
+def get_needs_index(app, env):
+    """
+    Return the needs index of the current build.
+
+    The index is built on the first call after the needs have been resolved and is
+    shared by everything that runs later in the build.
+    """
+    if getattr(app, 'needs_index', None) is None:
+        from sphinx_needs.data import SphinxNeedsData
+
+        app.needs_index = NeedsIndex(SphinxNeedsData(env).get_needs_view())
+    return app.needs_index
+
+
+def run_checks(app, env):
+    """Hook for env-check-consistency: run all registered checks in a single traversal"""
+    # Needs may have changed since the previous build in this process
+    app.needs_index = None
+    index = get_needs_index(app, env)
+    checks = [check_class(app) for check_class in getattr(app, 'need_checks', [])]
+
+    checks_by_type = defaultdict(list)
+    for check in checks:
+        checks_by_type[check.need_type].append(check)
+
+    for need_type, type_checks in checks_by_type.items():
+        # Union of the fields read by the checks, in declaration order
+        fields = list(dict.fromkeys(field for check in type_checks for field in check.fields))
+        logger.debug(f"Validating {need_type} needs, reading fields: {', '.join(fields)}")
+
+        needs = index.of_type(need_type)
+        get_build_metrics(app).inc("needs_checked", len(needs), type=need_type)
+        pbar = get_tqdm(iterable=needs.items(), desc=f"Validating {need_type} needs", bar_format=bar_format, unit="need")
+        for need_id, need in pbar:
+            values = {field: need.get(field) for field in fields}
+            for check in type_checks:
+                check.visit(need_id, {field: values[field] for field in check.fields})
+        pbar.close()
+
+    for check in checks:
+        check.finish(app, env)
@@ -4,10 +4,28 @@ Module to generate checksums for guidelines and write paragraph-ids.json file.
 import hashlib
 import json
 import os
+import pickle
 from collections import defaultdict
+from pathlib import Path
 import sphinx
-from sphinx_needs.data import SphinxNeedsData
+from sphinx.util.parallel import parallel_available
 from .common import logger
+from .metrics import get_build_metrics
+from .rules import GUIDELINE_ELEMENTS, incomplete_guidelines_error, missing_guideline_elements
+from .validation import get_needs_index
+
+# Need fields that are not part of the checksum
+excluded_checksum_fields = ('content', 'docname', 'lineno', 'refid', 'content_node')
+
+# Need fields sphinx-needs derives from other documents. They can change without the
+# need's own document being re-read, so a cached checksum is only reused while they match.
+cross_document_fields = ('has_dead_links', 'has_forbidden_dead_links', 'constraints_passed', 'constraints_results')
+
+# File, relative to the doctree directory, caching need checksums between builds
+checksum_cache_name = "guideline_checksums.pickle"
+
+# Number of checksums to compute before fanning the work out to a process pool
+parallel_checksum_threshold = 256
 
 
 def calculate_checksum(content, options):
@@ -20,6 +38,140 @@ def calculate_checksum(content, options):
     hash_obj = hashlib.sha256(combined.encode('UTF-8'))
     return hash_obj.hexdigest()
 
+
+def need_checksum_input(need):
+    """Return the (content, options) a need's checksum is computed from"""
+    content = need.get('content', '')
+    options = {k: v for k, v in need.items() if k not in excluded_checksum_fields}
+    return content, options
+
+
+def calculate_need_checksum(checksum_input):
+    content, options = checksum_input
+    return calculate_checksum(content, options)
+
+
+def cross_document_fingerprint(need):
+    """The values of the fields of a need that depend on other documents"""
+    return tuple(
+        (k, need[k]) for k in sorted(need)
+        if k.endswith('_back') or k in cross_document_fields
+    )
+
+
+def checksummed_needs(all_needs):
+    """Yield the guidelines and the needs directly associated with them"""
+    for need in all_needs.values():
+        if need['type'] == 'guideline':
+            yield need
+            for related_id in need.get('parent_needs_back', []):
+                if related_id in all_needs:
+                    yield all_needs[related_id]
+
+
+def checksum_cache_path(app):
+    return Path(app.doctreedir) / checksum_cache_name
+
+
+def load_checksum_cache(app, env):
+    """
+    Load the checksums cached by previous builds, keeping only the documents that have not
+    been re-read since.
+
+    Returns:
+        Dict of docname -> need ID -> (cross-document fingerprint, checksum)
+    """
+    try:
+        with open(checksum_cache_path(app), 'rb') as f:
+            stored = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+
+    return {
+        docname: checksums
+        for docname, (read_stamp, checksums) in stored.items()
+        if env.all_docs.get(docname) == read_stamp
+    }
+
+
+def save_checksum_cache(app, env, cache):
+    """Store the checksums with the read time of their documents, replacing the file atomically"""
+    path = checksum_cache_path(app)
+    stored = {
+        docname: (env.all_docs[docname], checksums)
+        for docname, checksums in cache.items()
+        if docname in env.all_docs
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(stored, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write need checksum cache to {path}: {e}")
+
+
+def update_checksums(app, env):
+    """
+    Hook for env-check-consistency: compute the checksums of the needs whose documents were
+    re-read (or whose cross-document fields changed), reusing the others from previous builds.
+
+    Sphinx pickles the environment before this runs, and the needs can only be resolved
+    afterwards, so the checksums are cached in a file next to the environment. Each
+    document's entries are stamped with its read time in ``env.all_docs``; re-reading the
+    document invalidates them.
+    """
+    all_needs = get_needs_index(app, env).needs
+    cache = load_checksum_cache(app, env)
+
+    dirty = []
+    for need in checksummed_needs(all_needs):
+        cached = cache.get(need['docname'], {}).get(need['id'])
+        fingerprint = cross_document_fingerprint(need)
+        # Needs changed by needextend may be modified from any document: never reuse those
+        if cached is None or cached[0] != fingerprint or need.get('is_modified'):
+            dirty.append((need, fingerprint))
+
+    checksum_inputs = [need_checksum_input(need) for need, _ in dirty]
+    if len(dirty) >= parallel_checksum_threshold and parallel_available and app.parallel > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Sphinx's own parallel builds rely on fork as well
+        with ProcessPoolExecutor(max_workers=app.parallel, mp_context=multiprocessing.get_context('fork')) as pool:
+            checksums = list(pool.map(calculate_need_checksum, checksum_inputs, chunksize=64))
+    else:
+        checksums = [calculate_need_checksum(checksum_input) for checksum_input in checksum_inputs]
+
+    for (need, fingerprint), checksum in zip(dirty, checksums):
+        cache.setdefault(need['docname'], {})[need['id']] = (fingerprint, checksum)
+
+    # Drop the needs that no longer exist
+    cache = {
+        docname: {need_id: entry for need_id, entry in checksums.items() if need_id in all_needs}
+        for docname, checksums in cache.items()
+    }
+    if dirty:
+        save_checksum_cache(app, env, cache)
+    app.need_checksums = {
+        need_id: checksum for checksums in cache.values() for need_id, (_, checksum) in checksums.items()
+    }
+
+    metrics = get_build_metrics(app)
+    metrics.inc("need_checksums", len(dirty), state="computed")
+    metrics.inc("need_checksums", len(app.need_checksums) - len(dirty), state="reused")
+    logger.info(f"Computed {len(dirty)} need checksums, reused {len(app.need_checksums) - len(dirty)} from previous builds")
+
+
+def get_need_checksum(app, need):
+    """Return the checksum of a need, as computed while checking consistency when available"""
+    checksum = getattr(app, 'need_checksums', {}).get(need['id'])
+    if checksum is not None:
+        return checksum
+    return calculate_need_checksum(need_checksum_input(need))
+
+
 def write_guidelines_ids(app):
     """
     Write guideline IDs and checksums to JSON file with guidelines as the primary structure.
@@ -31,8 +183,7 @@ def write_guidelines_ids(app):
     """
     env = app.env
 
-    data = SphinxNeedsData(env)
-    all_needs = data.get_needs_view()
+    all_needs = get_needs_index(app, env).needs
     
 # Organize by document
     documents_data = defaultdict(lambda: {
@@ -56,10 +207,8 @@ def write_guidelines_ids(app):
             docname = need['docname']
             doc_uri = app.builder.get_target_uri(docname)
             
-            # Compute checksum for the guideline
-            content = need.get('content', '')
-            options = {k: v for k, v in need.items() if k not in ('content', 'docname', 'lineno', 'refid', 'content_node')}
-            checksum = calculate_checksum(content, options)
+            # Checksum for the guideline, computed while checking consistency
+            checksum = get_need_checksum(app, need)
             
             # Create guideline structure
             guideline_data = {
@@ -73,8 +222,6 @@ def write_guidelines_ids(app):
             }
             
             # Look for associated elements using parent_needs_back
-            missing_elements = []
-            
             # Get all needs that have this guideline as their parent
             parent_needs_back = need.get('parent_needs_back', [])
             
@@ -83,11 +230,8 @@ def write_guidelines_ids(app):
                     related_need = all_needs[related_id]
                     related_type = related_need.get('type')
                     
-                    # Compute checksum for the related need
-                    related_content = related_need.get('content', '')
-                    related_options = {k: v for k, v in related_need.items() 
-                                     if k not in ('content', 'docname', 'lineno', 'refid', 'content_node')}
-                    related_checksum = calculate_checksum(related_content, related_options)
+                    # Checksum for the related need
+                    related_checksum = get_need_checksum(app, related_need)
                     
                     # Create the related need data
                     related_data = {
@@ -105,12 +249,9 @@ def write_guidelines_ids(app):
                         guideline_data["compliant_example"] = related_data
             
             # Check for missing elements
-            if guideline_data["rationale"] is None:
-                missing_elements.append("rationale")
-            if guideline_data["non_compliant_example"] is None:
-                missing_elements.append("non_compliant_example")
-            if guideline_data["compliant_example"] is None:
-                missing_elements.append("compliant_example")
+            missing_elements = missing_guideline_elements(
+                [element for element in GUIDELINE_ELEMENTS if guideline_data[element] is not None]
+            )
             
             # Track incomplete guidelines
             if missing_elements:
@@ -137,17 +278,11 @@ def write_guidelines_ids(app):
         f.write("\n")
     
     logger.info(f"Guidelines IDs written to {output_file}")
+    get_build_metrics(app).set("guidelines_written", sum(len(doc_data["guidelines"]) for doc_data in documents))
     
     # Fail the build if we have incomplete guidelines
     if incomplete_guidelines:
-        error_message = "The following guidelines are missing required elements:\n\n"
-        
-        for incomplete in incomplete_guidelines:
-            error_message += f"Guideline: {incomplete['id']} ({incomplete['title']})\n"
-            error_message += f"Location: {incomplete['docname']}\n"
-            error_message += f"Missing: {', '.join(incomplete['missing'])}\n\n"
-        
-        error_message += "Each guideline must have an associated rationale, good example, and bad example."
+        error_message = incomplete_guidelines_error(incomplete_guidelines)
         logger.error(error_message)
         raise Exception(error_message)
 
@@ -3,14 +3,25 @@
 # SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
 
 import argparse
+import json
+import os
+import re
 import string
 import random
+from pathlib import Path
 from textwrap import dedent, indent
 
 # Configuration
 CHARS = string.ascii_letters + string.digits
 ID_LENGTH = 12
 
+ROOT_DIR = Path(__file__).resolve().parent
+SRC_DIR = ROOT_DIR / "src"
+ID_REGISTRY_CACHE = ROOT_DIR / "build" / "guideline-id-registry.json"
+ID_REGISTRY_FORMAT = 1
+
+id_field_pattern = re.compile(r"^\s*:id:\s*(\S+)", re.MULTILINE)
+
 # Mapping from issue body headers to dict keys
 # Changing issues fields name to snake_case (eg. 'Guideline Title' => 'guideline_title')
 issue_header_map = {
@@ -50,16 +61,19 @@ def guideline_rst_template(
     non_compliant_ex: str,
     compliant_example_prose: str,
     compliant_example: str,
+    id_registry: "GuidelineIdRegistry" = None,
 ) -> str:
     """
     Generate a .rst guideline entry from field values.
+
+    IDs are checked against id_registry, when given, so they are unique.
     """
 
     # Generate unique IDs
-    guideline_id = generate_id("gui")
-    rationale_id = generate_id("rat")
-    non_compliant_example_id = generate_id("non_compl_ex")
-    compliant_example_id = generate_id("compl_ex")
+    guideline_id = generate_id("gui", id_registry)
+    rationale_id = generate_id("rat", id_registry)
+    non_compliant_example_id = generate_id("non_compl_ex", id_registry)
+    compliant_example_id = generate_id("compl_ex", id_registry)
 
     # Normalize inputs
     def norm(value: str) -> str:
@@ -110,20 +124,105 @@ def guideline_rst_template(
     return guideline_text
 
 
-def generate_id(prefix):
-    """Generate a random ID with the given prefix."""
-    random_part = "".join(random.choice(CHARS) for _ in range(ID_LENGTH))
-    return f"{prefix}_{random_part}"
+class GuidelineIdRegistry:
+    """
+    The set of the :id: fields used in the RST sources, plus the IDs generated since loading.
 
+    Scanning results are cached per file with its modification time and size, so loading
+    the registry only re-reads the files that changed.
+    """
 
-def generate_guideline_template():
-    """Generate a complete guideline template with all required sections."""
-    # Generate IDs for all sections
-    guideline_id = generate_id("gui")
-    rationale_id = generate_id("rat")
-    non_compliant_example_id = generate_id("non_compl_ex")
-    compliant_example_id = generate_id("compl_ex")
+    def __init__(self, src_dir: Path = SRC_DIR, cache_path: Path = ID_REGISTRY_CACHE):
+        self.src_dir = Path(src_dir)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.files = {}
+        self.ids = set()
+
+    @classmethod
+    def load(cls, src_dir: Path = SRC_DIR, cache_path: Path = ID_REGISTRY_CACHE):
+        """Load the registry, refreshing the cache from the files that changed"""
+        registry = cls(src_dir, cache_path)
+        registry.refresh()
+        return registry
+
+    def _read_cache(self) -> dict:
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if cache.get("format") != ID_REGISTRY_FORMAT or cache.get("src_dir") != str(self.src_dir):
+            return {}
+        return cache.get("files", {})
+
+    def refresh(self):
+        """Rescan the RST files that changed since the cache was written"""
+        cached_files = self._read_cache()
+        files = {}
+        changed = False
+        for path in sorted(self.src_dir.rglob("*.rst")):
+            name = path.relative_to(self.src_dir).as_posix()
+            stat = path.stat()
+            cached = cached_files.get(name)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                files[name] = cached
+                continue
+            text = path.read_text(encoding="utf-8")
+            files[name] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "ids": id_field_pattern.findall(text),
+            }
+            changed = True
+
+        if changed or files.keys() != cached_files.keys():
+            self._write_cache(files)
+        self.files = files
+        self.ids = {id_ for entry in files.values() for id_ in entry["ids"]}
+
+    def _write_cache(self, files: dict):
+        if self.cache_path is None:
+            return
+        cache = {"format": ID_REGISTRY_FORMAT, "src_dir": str(self.src_dir), "files": files}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # The cache only saves time
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self.ids
 
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, id_: str):
+        self.ids.add(id_)
+
+
+def generate_id(prefix, registry=None):
+    """
+    Generate a random ID with the given prefix.
+
+    When a registry is given the ID is not in it, and is added to it.
+    """
+    while True:
+        random_part = "".join(random.choice(CHARS) for _ in range(ID_LENGTH))
+        new_id = f"{prefix}_{random_part}"
+        if registry is None:
+            return new_id
+        if new_id not in registry:
+            registry.add(new_id)
+            return new_id
+
+
+def generate_guideline_template(id_registry=None):
+    """Generate a complete guideline template with all required sections."""
     template = guideline_rst_template(
         guideline_title="Title Here",
         category="",
@@ -140,6 +239,7 @@ def generate_guideline_template():
         non_compliant_ex=""" fn example_function() {\n          // Non-compliant implementation\n       } """,
         compliant_example_prose="Explanation of code example.",
         compliant_example=""" fn example_function() {\n          // Compliant implementation\n       } """,
+        id_registry=id_registry,
     )
     return template
 
@@ -156,6 +256,11 @@ def parse_args():
         default=1,
         help="Number of templates to generate (default: 1)",
     )
+    parser.add_argument(
+        "--no-id-registry",
+        action="store_true",
+        help="Do not check the generated IDs against the IDs used in src/",
+    )
     return parser.parse_args()
 
 
@@ -163,12 +268,13 @@ def main():
     """Generate the specified number of guideline templates."""
     args = parse_args()
     num_templates = args.number_of_templates
+    id_registry = None if args.no_id_registry else GuidelineIdRegistry.load()
 
     for i in range(num_templates):
         if num_templates > 1:
             print(f"=== Template {i + 1} ===\n")
 
-        template = generate_guideline_template()
+        template = generate_guideline_template(id_registry)
         print(template)
 
         if num_templates > 1 and i < num_templates - 1:
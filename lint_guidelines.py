@@ -0,0 +1,253 @@
+#!/usr/bin/env -S uv run
+# SPDX-License-Identifier: MIT OR Apache-2.0
+# SPDX-FileCopyrightText: The Coding Guidelines Subcommittee Contributors
+
+"""
+Check the guidelines without building the documentation.
+
+The ``.. guideline::`` directives and the rationale and examples nested in them
+are read straight from the RST sources, and checked with the same rules, and
+reported with the same messages, as the Sphinx build:
+
+- every guideline sets the fields in ``required_guideline_fields`` of ``src/conf.py``
+- every guideline references a well-formed FLS ID that exists in ``src/spec.lock``
+- every guideline has a rationale, a non-compliant and a compliant example
+
+Neither Sphinx nor the extension package is imported, so a run takes a fraction
+of a second and is suitable for pre-commit hooks. FLS IDs are checked against the
+lock file, as in an offline build; the build additionally compares the lock file
+with the published specification.
+"""
+
+import argparse
+import ast
+import importlib.util
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+SRC_DIR = ROOT_DIR / "src"
+EXTENSION_DIR = ROOT_DIR / "exts" / "coding_guidelines"
+
+
+def load_module(name, path):
+    """Load a module of the extension by path, without importing the package"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+rules = load_module("coding_guidelines_rules", EXTENSION_DIR / "rules.py")
+spec_lock_index = load_module("coding_guidelines_spec_lock_index", EXTENSION_DIR / "spec_lock_index.py")
+
+# Shared with ./make.py builds, which keep their doctrees in build/doctrees
+INDEX_DIR = ROOT_DIR / "build" / "doctrees" / spec_lock_index.INDEX_DIR_NAME
+
+# Directives of the needs that make up a guideline
+NEED_DIRECTIVES = ("guideline", *rules.GUIDELINE_ELEMENTS)
+
+# Directives whose content is not parsed as RST
+LITERAL_DIRECTIVES = ("code-block", "code", "sourcecode", "parsed-literal")
+
+directive_pattern = re.compile(r"^(\s*)\.\.\s+([\w:-]+)::(?:\s+(.*?))?\s*$")
+option_pattern = re.compile(r"^\s+:([\w-]+):(?:\s+(.*?))?\s*$")
+
+
+def indentation(line):
+    return len(line) - len(line.lstrip())
+
+
+def parse_needs(path, docname):
+    """Parse the guideline needs of an RST file, see parse_needs_text"""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_needs_text(f.read(), docname)
+
+
+def parse_needs_text(text, docname):
+    """
+    Parse the guideline needs of an RST document.
+
+    This is not a full RST parser: it follows the indentation of directives and
+    skips literal blocks, which is all the guideline sources need.
+
+    Returns:
+        List of dicts with the options of every guideline, its 'title', 'id',
+        'docname', 'lineno' and the need types nested in it as 'elements'
+    """
+    lines = text.splitlines()
+
+    guidelines = []
+    # (indentation, need) of the need directives the current line is nested in
+    open_needs = []
+    # Indentation of the line that started the current literal block
+    literal_indent = None
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        if not line.strip():
+            continue
+        indent = indentation(line)
+        if literal_indent is not None:
+            if indent > literal_indent:
+                continue
+            literal_indent = None
+        while open_needs and open_needs[-1][0] >= indent:
+            open_needs.pop()
+
+        match = directive_pattern.match(line)
+        if match is None:
+            if line.rstrip().endswith("::") and not line.lstrip().startswith(".."):
+                literal_indent = indent
+            continue
+
+        directive = match.group(2)
+        if directive in LITERAL_DIRECTIVES:
+            literal_indent = indent
+            continue
+        if directive not in NEED_DIRECTIVES:
+            continue
+
+        need = {"type": directive, "title": match.group(3) or "", "docname": docname, "lineno": i}
+        while i < len(lines) and indentation(lines[i]) > indent:
+            option = option_pattern.match(lines[i])
+            if option is None:
+                break
+            need[option.group(1)] = option.group(2) or ""
+            i += 1
+
+        parent = open_needs[-1][1] if open_needs else None
+        if directive == "guideline":
+            need["elements"] = []
+            guidelines.append(need)
+        elif parent is not None and parent["type"] == "guideline":
+            parent["elements"].append(directive)
+        open_needs.append((indent, need))
+
+    return guidelines
+
+
+def parse_file(args):
+    path, docname = args
+    return parse_needs(path, docname)
+
+
+def read_required_fields(conf_path):
+    """Read required_guideline_fields from conf.py without executing it"""
+    try:
+        with open(conf_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=str(conf_path))
+    except OSError:
+        return list(rules.DEFAULT_REQUIRED_GUIDELINE_FIELDS)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "required_guideline_fields" for target in node.targets
+        ):
+            return list(ast.literal_eval(node.value))
+    return list(rules.DEFAULT_REQUIRED_GUIDELINE_FIELDS)
+
+
+def lint(guidelines, required_fields, fls_ids):
+    """
+    Check the parsed guidelines.
+
+    Args:
+        guidelines: Guidelines returned by parse_needs
+        required_fields: Fields every guideline must set
+        fls_ids: Container of the FLS IDs of the specification
+
+    Returns:
+        List of error messages
+    """
+    errors = []
+    invalid_ids = []
+    incomplete_guidelines = []
+
+    for guideline in guidelines:
+        missing_fields = rules.missing_required_fields(guideline, required_fields)
+        if missing_fields:
+            errors.append(rules.required_fields_error(guideline, missing_fields))
+
+        fls_value = guideline.get("fls")
+        format_error = rules.fls_format_error(guideline.get("id"), fls_value)
+        if format_error is not None:
+            errors.append(format_error)
+        elif fls_value not in fls_ids:
+            invalid_ids.append((guideline.get("id"), fls_value))
+
+        missing_elements = rules.missing_guideline_elements(guideline["elements"])
+        if missing_elements:
+            incomplete_guidelines.append({
+                "id": guideline.get("id"),
+                "title": guideline["title"] or "Untitled Guideline",
+                "missing": missing_elements,
+                "docname": guideline["docname"],
+            })
+
+    if invalid_ids:
+        errors.append(rules.nonexistent_fls_ids_error(invalid_ids))
+    if incomplete_guidelines:
+        errors.append(rules.incomplete_guidelines_error(incomplete_guidelines))
+    return errors
+
+
+def collect_files(paths, src_dir):
+    """Return (path, docname) for every RST file under the given paths"""
+    files = []
+    for path in paths:
+        path = Path(path)
+        candidates = sorted(path.rglob("*.rst")) if path.is_dir() else [path]
+        for candidate in candidates:
+            try:
+                docname = candidate.resolve().relative_to(src_dir.resolve()).with_suffix("")
+            except ValueError:
+                docname = candidate.with_suffix("")
+            files.append((candidate, docname.as_posix()))
+    return files
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the guidelines without building the documentation")
+    parser.add_argument("paths", nargs="*", type=Path, help="RST files or directories to check (default: the src directory)")
+    parser.add_argument("--src", type=Path, default=SRC_DIR, help="source directory holding conf.py and spec.lock")
+    parser.add_argument("--spec-lock", type=Path, help="spec lock file to check FLS IDs against, plain or compressed (default: the lock in <src>)")
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR, help="directory of the spec lock indexes (default: build/doctrees/spec_lock_index)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="files parsed in parallel (default: number of CPUs)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+
+    files = collect_files(args.paths or [args.src], args.src)
+    if args.jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(files))) as pool:
+            parsed = list(pool.map(parse_file, files))
+    else:
+        parsed = [parse_file(file) for file in files]
+    guidelines = [guideline for file_guidelines in parsed for guideline in file_guidelines]
+
+    required_fields = read_required_fields(args.src / "conf.py")
+    fls_ids = spec_lock_index.SpecLockIndex.open(args.spec_lock or spec_lock_index.find_lock(args.src), args.index_dir)
+    errors = lint(guidelines, required_fields, fls_ids)
+
+    elapsed = time.perf_counter() - start
+    for error in errors:
+        print(error.rstrip("\n"), end="\n\n", file=sys.stderr)
+    summary = f"Checked {len(guidelines)} guidelines in {len(files)} files in {elapsed:.2f}s"
+    if errors:
+        sys.exit(f"{summary}: {len(errors)} error{'s' if len(errors) > 1 else ''}")
+    print(f"{summary}: no errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import functools
 import json
 import re
 import argparse
 import sys
 import os
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from textwrap import indent
 from m2r import convert
 
@@ -12,12 +16,53 @@ parent_dir = os.path.abspath(os.path.join(script_dir, ".."))
 sys.path.append(parent_dir)
 
 from generate_guideline_templates import (
+    GuidelineIdRegistry,
     guideline_rst_template,
+    id_field_pattern,
     issue_header_map,
 )
 
 
+# Inputs made only of these characters contain no Markdown syntax, apart from what the
+# line checks in is_plain_text rule out
+plain_text_pattern = re.compile(r"[A-Za-z0-9 .,;:'\"?!()\n-]*")
+# Lines m2r would turn into list items, and RST comments or directives
+special_line_pattern = re.compile(r"^(-|\d+[.)]|\.\.)")
+
+
+def is_plain_text(markdown: str) -> bool:
+    """
+    Whether the Markdown is only plain paragraphs, whose conversion does not need m2r
+    """
+    # m2r rewrites "::", the RST literal block marker
+    if not plain_text_pattern.fullmatch(markdown) or "::" in markdown:
+        return False
+    for line in markdown.splitlines():
+        if not line.strip():
+            continue
+        # Indentation makes code blocks and nested lists, trailing spaces make line breaks
+        if line != line.strip() or special_line_pattern.match(line):
+            return False
+    return True
+
+
+def plain_text_to_rst(markdown: str) -> str:
+    """Convert plain paragraphs exactly like m2r does"""
+    paragraphs = re.split(r"\n(?: *\n)+", markdown.strip(" \n"))
+    paragraphs = [paragraph for paragraph in paragraphs if paragraph]
+    if not paragraphs:
+        return ""
+    return "\n" + "\n\n".join(paragraphs) + "\n"
+
+
+@functools.lru_cache(maxsize=4096)
 def md_to_rst(markdown: str) -> str:
+    """
+    Convert Markdown to RST. Plain paragraphs take a fast path, everything else goes
+    through m2r; conversions are cached by content.
+    """
+    if is_plain_text(markdown):
+        return plain_text_to_rst(markdown)
     return convert(markdown)
 
 
@@ -58,17 +103,38 @@ def extract_form_fields(issue_body: str) -> dict:
     return fields
 
 
+def chapter_filename(chapter: str) -> str:
+    return f"src/coding-guidelines/{chapter.lower().replace(' ', '-')}.rst"
+
+
 def save_guideline_file(content: str, chapter: str):
     """
     Appends a guideline to a chapter
     """
-    filename = f"src/coding-guidelines/{chapter.lower().replace(' ', '-')}.rst"
+    filename = chapter_filename(chapter)
     with open(filename, "a", encoding="utf-8") as f:
         f.write(content)
     print(f"Saved guideline to {filename}")
 
 
-def guideline_template(fields: dict) -> str:
+def save_guideline_files(results: list, log=sys.stdout):
+    """
+    Appends the guidelines of a batch to their chapters, opening each chapter file once.
+    Guidelines are appended in the order of the batch.
+    """
+    by_chapter = defaultdict(list)
+    for result in results:
+        if "content" in result:
+            by_chapter[result["chapter"]].append(result["content"])
+
+    for chapter, contents in by_chapter.items():
+        filename = chapter_filename(chapter)
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write("".join(contents))
+        print(f"Saved {len(contents)} guideline(s) to {filename}", file=log)
+
+
+def guideline_template(fields: dict, id_registry: GuidelineIdRegistry = None) -> str:
     """
     This function turns a dictionary that contains the guideline fields
     into a proper .rst guideline format
@@ -114,11 +180,100 @@ def guideline_template(fields: dict) -> str:
         non_compliant_ex=format_code_block(get("non_compliant_ex")),
         compliant_example_prose=compliant_example_prose_text,
         compliant_example=format_code_block(get("compliant_example")),
+        id_registry=id_registry,
     )
 
     return guideline_text
 
 
+def content_output(content: str) -> str:
+    """The guideline content as printed for a single issue, between the content markers"""
+    return f"=====CONTENT=====\n{content}\n=====CONTENT=END=====\n"
+
+
+def render_issue(json_issue: dict, id_registry: GuidelineIdRegistry = None) -> dict:
+    """
+    Turn an issue (as returned by the GitHub API) into its guideline.
+    The generated IDs are not in id_registry, when given.
+
+    Returns:
+        Dict with the issue number and title, the chapter and the guideline content
+    """
+    fields = extract_form_fields(json_issue["body"])
+    return {
+        "number": json_issue.get("number"),
+        "title": json_issue.get("title"),
+        "chapter": fields["chapter"],
+        "content": guideline_template(fields, id_registry),
+    }
+
+
+def _render_issue_or_error(json_issue: dict) -> dict:
+    try:
+        return render_issue(json_issue)
+    except Exception as e:
+        return {"number": json_issue.get("number"), "title": json_issue.get("title"), "error": repr(e)}
+
+
+def _reseed_worker():
+    # Forked workers inherit the parent's random state, which would repeat generated IDs
+    random.seed()
+
+
+def parse_issues(text: str) -> list:
+    """Parse a batch of issues given as a JSON array, a single JSON object or JSON Lines"""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+def render_issues(issues: list, jobs: int = None, id_registry: GuidelineIdRegistry = None) -> list:
+    """
+    Render a batch of issues, in parallel when there is more than one job.
+
+    Returns:
+        One result per issue, in the order of the issues. Issues that fail to render
+        get an ``error`` instead of a ``content``.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(issues) < 2:
+        results = [_render_issue_or_error(issue) for issue in issues]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(issues)), initializer=_reseed_worker) as pool:
+            results = list(pool.map(_render_issue_or_error, issues, chunksize=max(1, len(issues) // (jobs * 4))))
+
+    if id_registry is not None:
+        # Workers cannot see each other's IDs: re-render the issues whose IDs are taken
+        for i, result in enumerate(results):
+            if "content" not in result:
+                continue
+            ids = id_field_pattern.findall(result["content"])
+            if any(id_ in id_registry for id_ in ids):
+                results[i] = render_issue(issues[i], id_registry)
+            else:
+                for id_ in ids:
+                    id_registry.add(id_)
+    return results
+
+
+def run_batch(args):
+    """Render every issue read from stdin and print one JSON result per line"""
+    results = render_issues(parse_issues(sys.stdin.read()), args.jobs, GuidelineIdRegistry.load())
+    for result in results:
+        print(json.dumps(result))
+
+    if args.save:
+        # stdout carries the results, report the saved files on stderr
+        save_guideline_files(results, log=sys.stderr)
+
+    failed = [result for result in results if "error" in result]
+    for result in failed:
+        print(f"Failed to convert issue {result['number']}: {result['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
     # parse arguments
     parser = argparse.ArgumentParser(
@@ -127,25 +282,37 @@ if __name__ == "__main__":
     parser.add_argument(
         "--save", action="store_true", help="Save the generated guideline file."
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Read a JSON array or JSON Lines of issues and print one JSON result per issue.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes in batch mode (default: number of CPUs).",
+    )
     args = parser.parse_args()
 
+    if args.batch:
+        sys.exit(run_batch(args))
+
     ## locally test with `cat scripts/test_issue_sample.json | python3 scripts/auto-pr-helper.py`
     ## or use `curl https://api.github.com/repos/rustfoundation/safety-critical-rust-coding-guidelines/issues/135 | uv run python scripts/auto-pr-helper.py`
+    ## convert many issues at once with `--batch`, reading a JSON array or JSON Lines of issues:
+    ## `curl "https://api.github.com/repos/rustfoundation/safety-critical-rust-coding-guidelines/issues?labels=coding-guideline" | uv run python scripts/auto-pr-helper.py --batch`
 
     # Read json from stdin
     stdin_issue_json = sys.stdin.read()
     json_issue = json.loads(stdin_issue_json)
 
-    issue_number = json_issue["number"]
-    issue_title = json_issue["title"]
-    issue_body = json_issue["body"]
-    fields = extract_form_fields(issue_body)
-    chapter = fields["chapter"]
-    content = guideline_template(fields)
+    result = render_issue(json_issue, GuidelineIdRegistry.load())
+    chapter = result["chapter"]
+    content = result["content"]
 
-    print("=====CONTENT=====")
-    print(content)
-    print("=====CONTENT=END=====")
+    print(content_output(content), end="")
 
     if args.save:
         save_guideline_file(content, chapter)